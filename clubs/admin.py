@@ -19,5 +19,5 @@ class ClubAdmin(admin.ModelAdmin):
 @admin.register(Membership)
 class MembershipAdmin(admin.ModelAdmin):
     list_display = [
-        'user','club','is_owner','is_officer','is_member'
+        'user','club','role'
     ]
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""Read-only JSON API, version 1.
+
+Endpoints read values() rows rather than model instances, let the client
+pick fields with ?fields=name,location and page with the keyset cursors of
+clubs.pagination. Lists are streamed: rows are fetched from the database in
+chunks and written out as they are serialized, so memory stays flat however
+large a page is."""
+import json
+from functools import wraps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from clubs.models import Club, Membership
+from clubs.pagination import InvalidCursor, KeysetPaginator, clamp_page_size
+from clubs.views import CLUB_SORT_KEYS, MEMBER_SORT_KEYS
+
+# Rows fetched from the database per round trip while streaming a list
+STREAM_CHUNK_SIZE = 200
+
+ROLE_NAMES = {role.value: role.name.lower() for role in Membership.Role}
+
+# Public field name -> values() lookup, per resource
+CLUB_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'location': 'location',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'member_count': 'member_count',
+    'owner_first_name': 'owner__first_name',
+    'owner_last_name': 'owner__last_name',
+}
+# The roster as officers see it
+MEMBER_FIELDS = {
+    'id': 'id',
+    'role': 'role',
+    'username': 'user__username',
+    'first_name': 'user__first_name',
+    'last_name': 'user__last_name',
+    'bio': 'user__bio',
+    'statement': 'user__statement',
+    'chess_xp': 'user__chess_xp',
+    'updated_at': 'updated_at',
+}
+# The roster as other members see it: view_members shows them no emails, statements or experience
+MEMBER_PUBLIC_FIELDS = {field: MEMBER_FIELDS[field] for field in ('id', 'role', 'first_name', 'last_name', 'bio')}
+MEMBER_PUBLIC_SORT_KEYS = {'name': MEMBER_SORT_KEYS['name']}
+MY_MEMBERSHIP_FIELDS = {
+    'id': 'id',
+    'role': 'role',
+    'club': 'club__name',
+    'location': 'club__location',
+    'member_count': 'club__member_count',
+    'updated_at': 'updated_at',
+}
+
+MY_MEMBERSHIP_SORT_KEYS = ('club__name', 'id')
+
+class ApiError(Exception):
+    """Raised by an endpoint to answer with a JSON error and status code."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def api_view(view_function):
+    """Answer GET requests from logged in users only, turning ApiError into a JSON error response."""
+    @wraps(view_function)
+    def modified_view_function(request, *args, **kwargs):
+        try:
+            if request.method != 'GET':
+                raise ApiError('Only GET is supported.', 405)
+            if not request.user.is_authenticated:
+                raise ApiError('Authentication required.', 401)
+            return view_function(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=error.status)
+    return modified_view_function
+
+def selected_fields(request, available):
+    """Return the public field names requested with ?fields=, defaulting to all of them."""
+    fields = [field.strip() for field in request.GET.get('fields', '').split(',') if field.strip()]
+    if not fields:
+        return list(available)
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ApiError(f'Unknown fields: {", ".join(unknown)}. Available: {", ".join(available)}.')
+    return fields
+
+def row_serializer(fields, available):
+    """Return a function turning a values() row into a dict of the selected public fields."""
+    lookups = [(field, available[field]) for field in fields]
+    def serialize(row):
+        data = {field: row[lookup] for field, lookup in lookups}
+        if 'role' in data:
+            data['role'] = ROLE_NAMES[data['role']]
+        return data
+    return serialize
+
+def values_for(fields, available, keys=()):
+    """Return the values() lookups needed for the selected fields and the ordering keys."""
+    return list(dict.fromkeys([available[field] for field in fields] + [key.lstrip('-') for key in keys]))
+
+def stream_page(request, queryset, available, keys, default_page_size):
+    """Stream a keyset page of values() rows as {"results": [...], "next": cursor}."""
+    fields = selected_fields(request, available)
+    page_size = clamp_page_size(request.GET.get('page_size'), default_page_size, settings.API_MAX_PAGE_SIZE)
+    paginator = KeysetPaginator(queryset.values(*values_for(fields, available, keys)), keys, page_size)
+    try:
+        page = paginator.stream(request.GET.get('after'), STREAM_CHUNK_SIZE)
+    except InvalidCursor:
+        raise ApiError('Invalid cursor.')
+    serialize = row_serializer(fields, available)
+
+    def content():
+        yield '{"results":['
+        separator, chunk = '', []
+        for row in page:
+            chunk.append(json.dumps(serialize(row), cls=DjangoJSONEncoder))
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield separator + ','.join(chunk)
+                separator, chunk = ',', []
+        if chunk:
+            yield separator + ','.join(chunk)
+        yield '],"next":' + json.dumps(page.next_cursor) + '}'
+    return StreamingHttpResponse(content(), content_type='application/json')
+
+def sort_keys(request, sort_keys, default):
+    """Return the ordering keys named by ?sort=, raising ApiError for an unknown sort."""
+    sort = request.GET.get('sort', default)
+    if sort not in sort_keys:
+        raise ApiError(f'Unknown sort: {sort}. Available: {", ".join(sort_keys)}.')
+    return sort_keys[sort]
+
+def club_membership(request, club_name):
+    """Return the caller's membership of a club, raising ApiError unless they are a member."""
+    membership = Membership.objects.members().filter(user = request.user, club__name = club_name).first()
+    if membership is None:
+        if not Club.objects.filter(name = club_name).exists():
+            raise ApiError('Club not found.', 404)
+        raise ApiError('Only members can see this club\'s roster.', 403)
+    return membership
+
+"""API view listing the club directory"""
+@api_view
+def clubs(request):
+    keys = sort_keys(request, CLUB_SORT_KEYS, 'created')
+    return stream_page(request, Club.objects.all(), CLUB_FIELDS, keys, settings.API_PAGE_SIZE)
+
+"""API view of one club"""
+@api_view
+def club_detail(request, club_name):
+    fields = selected_fields(request, CLUB_FIELDS)
+    row = Club.objects.filter(name = club_name).values(*values_for(fields, CLUB_FIELDS)).first()
+    if row is None:
+        raise ApiError('Club not found.', 404)
+    return JsonResponse(row_serializer(fields, CLUB_FIELDS)(row))
+
+"""API view listing the members of a club, for its members; only officers see every field"""
+@api_view
+def club_members(request, club_name):
+    membership = club_membership(request, club_name)
+    if membership.is_officer:
+        available, keys = MEMBER_FIELDS, sort_keys(request, MEMBER_SORT_KEYS, 'name')
+    else:
+        available, keys = MEMBER_PUBLIC_FIELDS, sort_keys(request, MEMBER_PUBLIC_SORT_KEYS, 'name')
+    roster = Membership.objects.members().filter(club = membership.club_id)
+    return stream_page(request, roster, available, keys, settings.API_PAGE_SIZE)
+
+"""API view listing the caller's own memberships, including pending applications"""
+@api_view
+def my_memberships(request):
+    memberships = Membership.objects.filter(user = request.user)
+    return stream_page(request, memberships, MY_MEMBERSHIP_FIELDS, MY_MEMBERSHIP_SORT_KEYS, settings.API_PAGE_SIZE)
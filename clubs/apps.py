@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ClubsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clubs'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from clubs import signals
+        post_migrate.connect(signals.restore_search_index, sender=self)
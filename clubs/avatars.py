@@ -0,0 +1,166 @@
+"""Local proxy for Gravatar images.
+
+Avatars are kept in a content-addressed cache under AVATAR_CACHE_DIR: every
+image is written once to blobs/<sha256>, and refs/<email hash>-<size> records
+which blob an avatar currently points at. A ref older than
+AVATAR_REVALIDATE_AFTER is still served while a background thread fetches a
+fresh copy. Avatars that cannot be fetched are served as a placeholder
+generated locally from the email hash."""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+EMAIL_HASH_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+# Upstream images larger than this are treated as unavailable
+MAX_AVATAR_BYTES = 1024 * 1024
+
+Avatar = namedtuple('Avatar', ['content', 'content_type', 'etag', 'placeholder'])
+
+class AvatarUnavailable(Exception):
+    """Raised by a fetcher when the upstream image cannot be retrieved."""
+
+def valid_avatar(email_hash, size):
+    """Return whether an email hash and size may be requested from the proxy.
+
+    Only the sizes the pages link to are served, so the cache holds at most
+    one image per size for each user whose hash the view has checked."""
+    return bool(EMAIL_HASH_PATTERN.fullmatch(email_hash)) and size in settings.AVATAR_SIZES
+
+def fetch_gravatar(email_hash, size):
+    """Fetch an avatar from AVATAR_UPSTREAM_URL, returning its content type and bytes."""
+    url = settings.AVATAR_UPSTREAM_URL.format(hash=email_hash, size=size)
+    try:
+        with urlopen(Request(url, headers={'Accept': 'image/*'}), timeout=settings.AVATAR_FETCH_TIMEOUT) as response:
+            content_type = response.headers.get_content_type()
+            content = response.read(MAX_AVATAR_BYTES + 1)
+    except (URLError, OSError, ValueError) as error:
+        raise AvatarUnavailable(str(error)) from error
+    if not content_type.startswith('image/') or not content or len(content) > MAX_AVATAR_BYTES:
+        raise AvatarUnavailable(f'Unusable response from {url}')
+    return content_type, content
+
+def get_fetcher():
+    """Return the callable configured by AVATAR_FETCHER."""
+    return import_string(settings.AVATAR_FETCHER)
+
+def placeholder(email_hash, size):
+    """Return an SVG silhouette on a background colour derived from the email hash."""
+    hue = int(email_hash[:4], 16) % 360
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 100 100">'
+        f'<rect width="100" height="100" fill="hsl({hue}, 45%, 55%)"/>'
+        '<circle cx="50" cy="38" r="18" fill="#fff"/>'
+        '<path d="M16 96c0-20 15-34 34-34s34 14 34 34z" fill="#fff"/>'
+        '</svg>'
+    ).encode()
+
+class AvatarCache:
+    """Content-addressed store of avatar images on disk."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def blob_path(self, digest):
+        return self.directory / 'blobs' / digest[:2] / digest
+
+    def ref_path(self, email_hash, size):
+        return self.directory / 'refs' / f'{email_hash}-{size}.json'
+
+    def read(self, email_hash, size):
+        """Return the cached avatar and the seconds since it was stored, or None."""
+        ref_path = self.ref_path(email_hash, size)
+        try:
+            ref = json.loads(ref_path.read_text())
+            content = self.blob_path(ref['digest']).read_bytes()
+            age = time.time() - ref_path.stat().st_mtime
+        except (OSError, ValueError, KeyError):
+            return None
+        return Avatar(content, ref['content_type'], f'"{ref["digest"]}"', ref.get('placeholder', False)), age
+
+    def write(self, email_hash, size, content_type, content, placeholder=False):
+        """Store an image, sharing the blob with any identical image, and point the avatar at it."""
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self.blob_path(digest)
+        if not blob_path.exists():
+            self._write_atomically(blob_path, content)
+        ref = {'digest': digest, 'content_type': content_type, 'placeholder': placeholder}
+        self._write_atomically(self.ref_path(email_hash, size), json.dumps(ref).encode())
+        return Avatar(content, content_type, f'"{digest}"', placeholder)
+
+    def touch(self, email_hash, size):
+        """Mark a cached avatar as freshly validated."""
+        try:
+            os.utime(self.ref_path(email_hash, size))
+        except OSError:
+            pass
+
+    def _write_atomically(self, path, content):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=path.parent)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(content)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+def get_cache():
+    """Return the cache stored in AVATAR_CACHE_DIR."""
+    return AvatarCache(settings.AVATAR_CACHE_DIR)
+
+def refresh_avatar(email_hash, size):
+    """Fetch an avatar from upstream into the cache.
+
+    If the fetch fails a previously fetched image is kept, otherwise the
+    placeholder is cached so the next attempt waits AVATAR_PLACEHOLDER_MAX_AGE."""
+    cache = get_cache()
+    try:
+        content_type, content = get_fetcher()(email_hash, size)
+    except AvatarUnavailable:
+        cached = cache.read(email_hash, size)
+        if cached is not None and not cached[0].placeholder:
+            cache.touch(email_hash, size)
+            return cached[0]
+        return cache.write(email_hash, size, 'image/svg+xml', placeholder(email_hash, size), placeholder=True)
+    return cache.write(email_hash, size, content_type, content)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='avatar-refresh')
+_pending = {}
+_pending_lock = threading.Lock()
+
+def schedule_refresh(email_hash, size):
+    """Refresh an avatar on a background thread, at most once at a time per avatar."""
+    key = (email_hash, size)
+    with _pending_lock:
+        if key not in _pending:
+            future = _executor.submit(refresh_avatar, email_hash, size)
+            _pending[key] = future
+            future.add_done_callback(lambda done: _forget_refresh(key))
+        return _pending[key]
+
+def _forget_refresh(key):
+    with _pending_lock:
+        _pending.pop(key, None)
+
+def get_avatar(email_hash, size):
+    """Return an avatar from the cache, fetching it on a miss and revalidating it in the background when stale."""
+    cached = get_cache().read(email_hash, size)
+    if cached is None:
+        return refresh_avatar(email_hash, size)
+    avatar, age = cached
+    if age > (settings.AVATAR_PLACEHOLDER_MAX_AGE if avatar.placeholder else settings.AVATAR_REVALIDATE_AFTER):
+        schedule_refresh(email_hash, size)
+    return avatar
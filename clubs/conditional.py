@@ -0,0 +1,66 @@
+"""Conditional GET support for pages rendered from clubs, memberships and users.
+
+A page declares what it is rendered from as cheap scalar subqueries: the
+newest updated_at of a queryset, the row count of a small one or a stored
+change counter. They are read in a single query, and combined with
+everything else the page depends on for the viewer into an ETag and a
+Last-Modified date. A browser revalidating an unchanged page then gets a
+304 without the view running."""
+import hashlib
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.db.models import Count, Subquery, Value
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from clubs.models import ChangeCounter, Club, Membership, User
+
+def latest_update(queryset):
+    """Return a subquery for the newest updated_at of a queryset, one index probe on an indexed column."""
+    return Subquery(queryset.order_by('-updated_at').values('updated_at')[:1])
+
+def row_count(queryset):
+    """Return a subquery for the row count of a queryset; only for querysets a few rows long."""
+    rows = queryset.order_by().annotate(_all = Value(1)).values('_all')
+    return Subquery(rows.annotate(count = Count('pk')).values('count'))
+
+def change_count(name):
+    """Return a subquery for the value of a ChangeCounter."""
+    return Subquery(ChangeCounter.objects.filter(name = name).values('value'))
+
+def navbar_sources(request, *args, **kwargs):
+    """What the menu every page shows is built from: the viewer's memberships and their clubs."""
+    memberships = Membership.objects.filter(user = request.user)
+    return [
+        row_count(memberships),
+        latest_update(memberships),
+        latest_update(Club.objects.filter(membership__user = request.user)),
+    ]
+
+def page_state(request, sources, *args, **kwargs):
+    """Return the values of a page's sources, read in one query and memoized on the request."""
+    if not hasattr(request, '_page_state'):
+        subqueries = [*navbar_sources(request), *[subquery for source in sources for subquery in source(request, *args, **kwargs)]]
+        summaries = {f'summary{index}': subquery for index, subquery in enumerate(subqueries)}
+        row = User.objects.filter(pk = request.user.pk).annotate(**summaries).values_list(*summaries).first()
+        request._page_state = [request.user.updated_at, *(row or ())]
+    return request._page_state
+
+def conditional_page(*sources):
+    """Answer If-None-Match and If-Modified-Since for a page built from what the sources return.
+
+    Each source is called with the view's arguments and returns a list of
+    subqueries from latest_update, row_count and change_count. The ETag also covers the viewer, their CSRF secret and any
+    pending messages, since all of them change what the page renders."""
+    def etag(request, *args, **kwargs):
+        state = page_state(request, sources, *args, **kwargs)
+        get_token(request)
+        fingerprint = [request.user.pk, request.META['CSRF_COOKIE'], len(get_messages(request)), *state]
+        return hashlib.md5(repr(fingerprint).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        timestamps = [value for value in page_state(request, sources, *args, **kwargs) if hasattr(value, 'utctimetuple')]
+        return max(timestamps, default=None)
+
+    def decorator(view_function):
+        return cache_control(private=True, no_cache=True)(condition(etag, last_modified)(view_function))
+    return decorator
@@ -0,0 +1,53 @@
+"""Template context processors for the clubs app."""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from clubs.models import Club, Membership
+
+JOINED_CLUBS_CACHE_KEY = 'joined_clubs:{user_id}'
+
+def joined_clubs_cache_key(user_id):
+    """Return the cache key holding the clubs a user is a member of."""
+    return JOINED_CLUBS_CACHE_KEY.format(user_id=user_id)
+
+def joined_clubs_cache_enabled():
+    """Return whether the "My Clubs" lists are cached across requests."""
+    return bool(getattr(settings, 'JOINED_CLUBS_CACHE_TIMEOUT', 0))
+
+def invalidate_joined_clubs(*user_ids):
+    """Drop the cached "My Clubs" lists of the given users."""
+    cache.delete_many([joined_clubs_cache_key(user_id) for user_id in user_ids])
+
+def member_clubs(user):
+    """Return the clubs a user is a member of."""
+    return Club.objects.filter(membership__user = user, membership__role__gte = Membership.Role.MEMBER)
+
+def get_joined_clubs(request):
+    """Return the clubs the logged in user is a member of, with only their names loaded.
+
+    The result is memoized on the request and, when JOINED_CLUBS_CACHE_TIMEOUT
+    is set, cached per user until one of their memberships changes. Only the
+    pk and name are cached: member counts, owners and versions change without
+    the user's memberships changing, so any other field is read fresh."""
+    if not hasattr(request, '_joined_clubs'):
+        key = joined_clubs_cache_key(request.user.pk)
+        clubs = cache.get(key) if joined_clubs_cache_enabled() else None
+        if clubs is None:
+            clubs = list(member_clubs(request.user).only('name'))
+            if joined_clubs_cache_enabled():
+                cache.set(key, clubs, settings.JOINED_CLUBS_CACHE_TIMEOUT)
+        request._joined_clubs = clubs
+    return request._joined_clubs
+
+def load_joined_clubs(request):
+    """Load the logged in user's clubs in full, owners included, for a page showing more than their names.
+
+    The navbar of the same request reuses them."""
+    request._joined_clubs = list(member_clubs(request.user).with_owner())
+    return request._joined_clubs
+
+def joined_clubs(request):
+    """Expose the "My Clubs" navbar list, only queried when a template uses it."""
+    if not request.user.is_authenticated:
+        return {'joined_clubs': []}
+    return {'joined_clubs': SimpleLazyObject(lambda: get_joined_clubs(request))}
@@ -0,0 +1,7 @@
+"""Settings of the demo data shared by the seed and loadtest commands."""
+
+# Password of every seeded user, demo accounts and generated users alike
+DEMO_PASSWORD = 'Password123'
+
+# Generated users get addresses on this domain, apart from the demo accounts
+SEED_EMAIL_DOMAIN = 'seed.example.org'
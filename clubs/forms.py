@@ -128,3 +128,68 @@ class PasswordForm(forms.Form):
         password_confirmation = self.cleaned_data.get('password_confirmation')
         if new_password != password_confirmation:
             self.add_error('password_confirmation', 'Confirmation does not match password.')
+
+class IdListField(forms.Field):
+    """Field accepting a list of integer ids, e.g. from a group of checkboxes."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            return [int(item) for item in value]
+        except (TypeError, ValueError):
+            raise forms.ValidationError('Enter a list of valid ids.')
+
+class BulkApplicationForm(forms.Form):
+    """Form enabling officers to approve or reject many applications at once."""
+    ACTIONS = [('approve', 'Approve'), ('reject', 'Reject')]
+
+    action = forms.ChoiceField(choices=ACTIONS)
+    applications = IdListField(required=False)
+    select_all = forms.BooleanField(required=False)
+
+    def clean(self):
+        """Require either a selection of applications or all pending ones."""
+        super().clean()
+        if not self.cleaned_data.get('select_all') and not self.cleaned_data.get('applications'):
+            self.add_error('applications', 'Select at least one application.')
+
+class RosterRowForm(SignUpForm):
+    """Form validating one row of an imported roster with the sign up rules.
+
+    The password may be left blank, giving the user an unusable password they
+    can reset. Email uniqueness is checked for a whole batch by the importer
+    rather than with a query per row."""
+
+    ROLES = [('applicant', 'Applicant'), ('member', 'Member'), ('officer', 'Officer')]
+
+    role = forms.ChoiceField(choices=ROLES, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['new_password'].required = False
+        self.fields['password_confirmation'].required = False
+        self.fields['chess_xp'].required = False
+
+    def clean_chess_xp(self):
+        chess_xp = self.cleaned_data.get('chess_xp')
+        return 0 if chess_xp is None else chess_xp
+
+    def clean_role(self):
+        return self.cleaned_data.get('role') or 'member'
+
+    def validate_unique(self):
+        pass
+
+    def rebind(self, data):
+        """Bind the form to another row, reusing its fields instead of copying them for every row."""
+        self.data = data
+        self.is_bound = True
+        self._errors = None
+        self.instance = User()
+        return self
+
+class RosterUploadForm(forms.Form):
+    """Form enabling owners to upload a CSV roster of members and applicants."""
+    roster = forms.FileField(label='Roster CSV')
@@ -0,0 +1,262 @@
+"""Load testing against the views of system/urls.py.
+
+Officers of seeded clubs are logged in, one session per thread, and each
+thread requests a weighted mix of URL names until the run is over. URL
+arguments are filled in from the session's user: club_name is one of the
+clubs they are an officer of and user_id their own id. Requests are
+made with the in-process test client, or over HTTP against a running server
+when a base URL is given. Latencies are collected per URL name and
+summarised as throughput and percentiles."""
+import math
+import random
+import re
+import threading
+import time
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urljoin
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import get_resolver, reverse
+from clubs.models import Membership, User
+
+DEFAULT_MIX = 'club_list=4,club_profile=3,view_members=2,application_list=1'
+
+class LoadTestError(Exception):
+    """Raised when a load test cannot be set up."""
+
+def parse_mix(mix):
+    """Parse "name=weight,name=weight" into {URL name: weight}."""
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.strip().partition('=')
+        try:
+            weights[name.strip()] = float(weight) if weight else 1.0
+        except ValueError:
+            raise LoadTestError(f'Invalid weight for {name}: {weight}')
+        if weights[name.strip()] <= 0:
+            raise LoadTestError(f'The weight of {name} must be positive.')
+    return weights
+
+def url_arguments(name):
+    """Return the names of the arguments the URL pattern called name takes."""
+    for pattern in get_resolver().url_patterns:
+        if getattr(pattern, 'name', None) == name:
+            return list(pattern.pattern.converters)
+    raise LoadTestError(f'No URL named {name} in {settings.ROOT_URLCONF}.')
+
+def percentile(ordered, fraction):
+    """Return the nearest-rank percentile of an ascending list of numbers."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def milliseconds(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+def summarise(latencies, statuses, elapsed):
+    """Return the throughput, latency percentiles in milliseconds and status counts of a set of requests."""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': sum(count for status, count in statuses.items() if status >= 400),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput': round(len(ordered) / elapsed, 3) if elapsed else None,
+        'mean_ms': milliseconds(sum(ordered) / len(ordered)) if ordered else None,
+        'p50_ms': milliseconds(percentile(ordered, 0.50)),
+        'p95_ms': milliseconds(percentile(ordered, 0.95)),
+        'p99_ms': milliseconds(percentile(ordered, 0.99)),
+        'max_ms': milliseconds(ordered[-1]) if ordered else None,
+    }
+
+class InProcessSession:
+    """A logged in test client session, calling the views without a server."""
+    target = 'in-process'
+
+    def __init__(self):
+        self.client = Client(raise_request_exception=False)
+
+    def log_in(self, username, password):
+        return self.client.login(username = username, password = password)
+
+    def get(self, path):
+        """Request a path and read the whole response, returning its status code."""
+        response = self.client.get(path)
+        if response.streaming:
+            for chunk in response.streaming_content:
+                pass
+        response.close()
+        return response.status_code
+
+class NoRedirects(HTTPRedirectHandler):
+    """Report redirects as responses, as the test client does, instead of following them."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+class HttpSession:
+    """A session logged in to a running server through its log in form."""
+
+    def __init__(self, base_url, timeout=30):
+        self.target = base_url
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), NoRedirects)
+
+    def log_in(self, username, password):
+        """Post the log in form, which redirects only when the credentials are accepted."""
+        url = urljoin(self.base_url, reverse('log_in'))
+        page = self.opener.open(url, timeout=self.timeout).read().decode()
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page)
+        if token is None:
+            return False
+        data = urlencode({'username': username, 'password': password, 'csrfmiddlewaretoken': token.group(1)}).encode()
+        return self.post(url, data) == 302
+
+    def post(self, url, data):
+        try:
+            with self.opener.open(Request(url, data, headers={'Referer': url}), timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            error.read()
+            return error.code
+
+    def get(self, path):
+        try:
+            with self.opener.open(urljoin(self.base_url, path), timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            error.read()
+            return error.code
+
+class VirtualUser:
+    """A logged in session together with what its user may request."""
+
+    def __init__(self, session, user, clubs):
+        self.session = session
+        self.user = user
+        self.clubs = clubs
+
+    def path(self, name, rng):
+        """Return a path for the URL called name, with arguments this user can access."""
+        values = {
+            'club_name': rng.choice(self.clubs),
+            'user_id': self.user.id,
+            'email_hash': self.user.email_hash,
+            'size': 120,
+        }
+        arguments = url_arguments(name)
+        unknown = [argument for argument in arguments if argument not in values]
+        if unknown:
+            raise LoadTestError(f'Cannot fill in {", ".join(unknown)} for {name}.')
+        return reverse(name, kwargs = {argument: values[argument] for argument in arguments})
+
+def officer_clubs(count, seed):
+    """Pick up to count users who are officers or owners of a club, returning (user id, [club names]) pairs."""
+    officers = {}
+    for user_id, club_name in (Membership.objects.filter(role__gte = Membership.Role.OFFICER)
+            .order_by('user_id', 'club_id').values_list('user_id', 'club__name').iterator()):
+        officers.setdefault(user_id, []).append(club_name)
+    chosen = random.Random(seed).sample(sorted(officers), min(count, len(officers)))
+    return [(user_id, officers[user_id]) for user_id in chosen]
+
+class LoadTest:
+    """Drives a weighted mix of URL names from several threads and collects the latency of every request."""
+
+    def __init__(self, mix, password, threads=8, requests=1000, duration=None, base_url=None, seed=0):
+        self.mix = parse_mix(mix)
+        for name in self.mix:
+            url_arguments(name)
+        self.threads = threads
+        self.requests = requests
+        self.duration = duration
+        self.password = password
+        self.base_url = base_url
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._latencies = {name: [] for name in self.mix}
+        self._statuses = {name: {} for name in self.mix}
+        self._errors = []
+
+    def new_session(self):
+        return HttpSession(self.base_url) if self.base_url else InProcessSession()
+
+    def log_in_users(self):
+        """Log in one virtual user per thread, cycling through the officers found if there are fewer."""
+        officers = officer_clubs(self.threads, self.seed)
+        if not officers:
+            raise LoadTestError('No officers to log in as, seed the database first.')
+        users = User.objects.in_bulk([user_id for user_id, clubs in officers])
+        virtual_users = []
+        for index in range(self.threads):
+            user_id, clubs = officers[index % len(officers)]
+            session = self.new_session()
+            if not session.log_in(users[user_id].username, self.password):
+                raise LoadTestError(f'Could not log in as {users[user_id].username}.')
+            virtual_users.append(VirtualUser(session, users[user_id], clubs))
+        return virtual_users
+
+    def run(self):
+        """Run the load test and return its results."""
+        with override_settings(ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']):
+            virtual_users = self.log_in_users()
+            self._deadline = None if self.duration is None else time.perf_counter() + self.duration
+            started = time.perf_counter()
+            workers = [threading.Thread(target=self._drive, args=(virtual_user, index)) for index, virtual_user in enumerate(virtual_users)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+        if self._errors:
+            raise self._errors[0]
+        everything = [latency for latencies in self._latencies.values() for latency in latencies]
+        statuses = {}
+        for view_statuses in self._statuses.values():
+            for status, count in view_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+        return {
+            'target': virtual_users[0].session.target,
+            'threads': self.threads,
+            'mix': self.mix,
+            'seed': self.seed,
+            'elapsed': round(elapsed, 3),
+            'overall': summarise(everything, statuses, elapsed),
+            'views': {name: summarise(self._latencies[name], self._statuses[name], elapsed) for name in self.mix},
+        }
+
+    def _next_request(self):
+        with self._lock:
+            if self._errors or (self.requests is not None and self._issued >= self.requests):
+                return False
+            if self._deadline is not None and time.perf_counter() >= self._deadline:
+                return False
+            self._issued += 1
+            return True
+
+    def _drive(self, virtual_user, index):
+        rng = random.Random(f'{self.seed}:{index}')
+        names, weights = list(self.mix), list(self.mix.values())
+        try:
+            while self._next_request():
+                name = rng.choices(names, weights)[0]
+                path = virtual_user.path(name, rng)
+                started = time.perf_counter()
+                status = virtual_user.session.get(path)
+                latency = time.perf_counter() - started
+                with self._lock:
+                    self._latencies[name].append(latency)
+                    self._statuses[name][status] = self._statuses[name].get(status, 0) + 1
+        except Exception as error:
+            with self._lock:
+                self._errors.append(error)
+        finally:
+            if not self.base_url:
+                connections.close_all()
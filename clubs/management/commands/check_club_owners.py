@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+from clubs.models import Club, Membership
+
+class Command(BaseCommand):
+    """Check that every club's owner column matches its owner membership."""
+    help = "Report clubs whose owner does not match their owner membership, and optionally repair them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Reset every club owner from its owner membership.')
+
+    def handle(self, *args, **options):
+        owners = Subquery(Membership.objects.filter(club = OuterRef('pk'), role = Membership.Role.OWNER).values('user')[:1])
+        rows = Club.objects.annotate(expected_owner = owners).values_list('id', 'name', 'owner', 'expected_owner')
+        mismatched = []
+        for club_id, name, owner_id, expected_owner_id in rows.iterator():
+            if owner_id != expected_owner_id:
+                mismatched.append(club_id)
+                self.stdout.write(f'{name}: owner is {owner_id}, owner membership says {expected_owner_id}')
+        if mismatched and options['fix']:
+            Club.objects.filter(pk__in = mismatched).update(owner = owners, version = F('version') + 1, updated_at = timezone.now())
+            self.stdout.write(f'Fixed the owner of {len(mismatched)} clubs.')
+        else:
+            self.stdout.write(f'{len(mismatched)} clubs have an inconsistent owner.')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from clubs.models import Club
+from clubs.roster_import import IMPORT_BATCH_SIZE, import_roster, read_roster
+
+class Command(BaseCommand):
+    """Import a CSV roster of members and applicants into a club."""
+    help = ("Create users and memberships of a club from a CSV file, reporting the rows that were rejected. "
+        "People who already have an account are added as applicants only.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('club', help='Name of the club to import into.')
+        parser.add_argument('csv_file', help='CSV with a heading row: first_name, last_name, email, password, bio, statement, chess_xp, role.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows written per transaction.')
+
+    def handle(self, *args, **options):
+        try:
+            club = Club.objects.get(name = options['club'])
+        except Club.DoesNotExist:
+            raise CommandError(f'Club "{options["club"]}" does not exist.')
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as file:
+                result = import_roster(club, read_roster(file), max(1, options['batch_size']))
+        except OSError as error:
+            raise CommandError(str(error))
+        for line, message in sorted(result.errors):
+            self.stderr.write(f'Line {line}: {message}')
+        for line, username in sorted(result.existing_accounts):
+            self.stdout.write(f'Line {line}: {username} already has an account and was added as an applicant only.')
+        self.stdout.write(f'Created {result.users_created} users and {result.memberships_created} memberships, rejected {len(result.errors)} rows.')
@@ -0,0 +1,44 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from clubs.demo import DEMO_PASSWORD
+from clubs.loadtest import DEFAULT_MIX, LoadTest, LoadTestError
+
+class Command(BaseCommand):
+    """Measure the throughput and latency of a mix of views under concurrent load."""
+    help = ("Log in officers of seeded clubs and request a weighted mix of URL names from many threads, "
+        "reporting throughput and p50/p95/p99 latency per view.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'URL names and weights, default {DEFAULT_MIX}.')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent sessions.')
+        parser.add_argument('--requests', type=int, default=1000, help='Total requests to make.')
+        parser.add_argument('--duration', type=float, help='Stop after this many seconds, even if requests remain.')
+        parser.add_argument('--base-url', help='Server to load, e.g. http://localhost:8000/. Without it views are called in process.')
+        parser.add_argument('--password', default=DEMO_PASSWORD, help='Password of the seeded users.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed choosing users and requests.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['requests'] < 1 or (options['duration'] is not None and options['duration'] <= 0):
+            raise CommandError('Threads, requests and duration must be positive.')
+        try:
+            results = LoadTest(options['mix'], options['password'], threads=options['threads'], requests=options['requests'],
+                duration=options['duration'], base_url=options['base_url'], seed=options['seed']).run()
+        except LoadTestError as error:
+            raise CommandError(str(error))
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f'Wrote the results to {options["output"]}.')
+
+    def report(self, results):
+        self.stdout.write(f'{results["overall"]["requests"]} requests to {results["target"]} from {results["threads"]} threads '
+            f'in {results["elapsed"]:.1f}s.')
+        self.stdout.write(f'{"view":<20} {"requests":>8} {"errors":>6} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+        for name, summary in [*results['views'].items(), ('overall', results['overall'])]:
+            if not summary['requests']:
+                self.stdout.write(f'{name:<20} {0:>8}')
+                continue
+            self.stdout.write(f'{name:<20} {summary["requests"]:>8} {summary["errors"]:>6} {summary["throughput"]:>8.1f} '
+                f'{summary["p50_ms"]:>8.1f} {summary["p95_ms"]:>8.1f} {summary["p99_ms"]:>8.1f}')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from clubs.models import Club, Membership
+
+class Command(BaseCommand):
+    """Recompute every club's member_count from its memberships to repair drift."""
+    help = "Recompute Club.member_count from the Membership table."
+
+    def handle(self, *args, **options):
+        members = (Membership.objects.members().filter(club = OuterRef('pk'))
+            .order_by().values('club').annotate(total = Count('id')).values('total'))
+        actual = Coalesce(Subquery(members, output_field=IntegerField()), Value(0))
+        drifted = Club.objects.annotate(actual = actual).exclude(member_count = F('actual'))
+        repaired = Club.objects.filter(pk__in = drifted.values('pk')).update(member_count = actual, updated_at = timezone.now())
+        self.stdout.write(f'Recounted members of {Club.objects.count()} clubs, {repaired} had drifted.')
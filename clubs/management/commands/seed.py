@@ -1,169 +1,304 @@
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
 from faker import Faker
-from clubs.models import User, Club, Membership
+from clubs.demo import DEMO_PASSWORD, SEED_EMAIL_DOMAIN
+from clubs.models import User, Club, Membership, email_hash
+
+# Distinct Faker values drawn once per run; rows pick from these pools so
+# generating a million rows costs random choices rather than Faker calls
+POOL_SIZE = 500
+
+# Page cache of the writer's SQLite connection while seeding; inserting into
+# the indexes of a million-row table in random order spills a smaller cache
+SQLITE_CACHE_KIB = 256 * 1024
+
+# Rows generated per task, each task with its own random generator seeded from
+# --seed and the task number, so the data does not depend on --workers
+GENERATION_CHUNK = 1000
+
+DEMO_USERS = [
+    ('Jebediah', 'Kerman', 'jeb@example.org', 'My name is jeb', 'I guide others to treasure I cannot possess', 1),
+    ('Valentina', 'Kerman', 'val@example.org', 'My name is val', 'I hate Tuesdays...', 2),
+    ('Billie', 'Kerman', 'billie@example.org', "Name's Bill", 'Zzz', 3),
+    ('Bob', 'Doe', 'bob@example.org', "Name's Bob", 'Whooo', 10),
+    ('Jane', 'Doe', 'jane@example.org', "Name's Jane", 'Thank you', 40),
+]
+
+DEMO_CLUBS = [
+    ('Kerbal Chess Club', 'This is kerbal chess club', 'New york'),
+    ('The Grand', 'This is the grand', 'London'),
+    ('Club B', 'This is club b', 'Bristol'),
+    ('Dragonfly', 'This is Dragonfly', 'London'),
+]
+
+DEMO_MEMBERSHIPS = [
+    ('jeb@example.org', 'Kerbal Chess Club', Membership.Role.MEMBER),
+    ('billie@example.org', 'Kerbal Chess Club', Membership.Role.OWNER),
+    ('val@example.org', 'Kerbal Chess Club', Membership.Role.OFFICER),
+    ('jeb@example.org', 'The Grand', Membership.Role.OFFICER),
+    ('billie@example.org', 'Club B', Membership.Role.MEMBER),
+    ('val@example.org', 'Dragonfly', Membership.Role.OWNER),
+    ('bob@example.org', 'The Grand', Membership.Role.OWNER),
+    ('jane@example.org', 'Club B', Membership.Role.OWNER),
+]
+
+def faker_pools(seed):
+    faker = Faker('en_GB')
+    faker.seed_instance(seed)
+    return {
+        'first_name': [faker.first_name() for _ in range(POOL_SIZE)],
+        'last_name': [faker.last_name() for _ in range(POOL_SIZE)],
+        'sentence': [faker.sentence() for _ in range(POOL_SIZE)],
+        'paragraph': [faker.paragraph() for _ in range(POOL_SIZE)],
+        'city': [faker.city() for _ in range(POOL_SIZE)],
+    }
+
+@contextmanager
+def sqlite_cache(kib):
+    """Enlarge the page cache of an SQLite connection for the duration of the block."""
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        previous = cursor.fetchone()[0]
+        cursor.execute(f'PRAGMA cache_size = {-int(kib)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA cache_size = {int(previous)}')
+
+def row_template(model, now, primary_key=False):
+    """Return {attname: default} for the columns of a model, prepared for the database.
+
+    auto_now and auto_now_add columns default to now. The primary key is only
+    included when the rows are to be inserted with explicit ids."""
+    template = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key and not primary_key:
+            continue
+        value = now if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False) else field.get_default()
+        template[field.attname] = field.get_db_prep_save(value, connection)
+    return template
+
+def make_row(template, values):
+    """Return the column values of one row, in template order."""
+    return tuple(values.get(attname, default) for attname, default in template.items())
+
+# Set in each worker process by start_generator
+_generator = None
+
+class RowGenerator:
+    """Generates the rows of one seeded dataset a chunk at a time, without touching the database.
+
+    Users and clubs are numbered from zero and given the ids the writer
+    reserved for them, so every row, memberships included, can be built
+    independently of the others."""
+
+    def __init__(self, seed, pools, password, templates, members_per_club):
+        self.seed = seed
+        self.pools = pools
+        self.password = password
+        self.templates = templates
+        self.members_per_club = members_per_club
+
+    def random(self, kind, chunk):
+        return random.Random(f'{self.seed}:{kind}:{chunk}')
+
+    def users(self, chunk, start, stop, first_user_id):
+        """Return the rows of users start to stop, all sharing the password hash."""
+        rng = self.random('users', chunk)
+        pools, template, rows = self.pools, self.templates['user'], []
+        for index in range(start, stop):
+            first_name, last_name = rng.choice(pools['first_name']), rng.choice(pools['last_name'])
+            local_part = '.'.join(re.sub(r'[^a-z]', '', name.lower()) for name in (first_name, last_name))
+            username = f'{local_part}.{index}@{SEED_EMAIL_DOMAIN}'
+            rows.append(make_row(template, {
+                'id': first_user_id + index, 'first_name': first_name, 'last_name': last_name, 'username': username,
+                'email_hash': email_hash(username), 'password': self.password,
+                'bio': rng.choice(pools['sentence']), 'statement': rng.choice(pools['paragraph']),
+                'chess_xp': rng.randrange(0, 2500),
+            }))
+        return rows
+
+    def clubs(self, chunk, start, stop, user_count, first_user_id, first_club_id):
+        """Return the rows of clubs start to stop and of their memberships.
+
+        The first user drawn for a club owns it, the next tenth are officers
+        and the rest members."""
+        rng = self.random('clubs', chunk)
+        pools, club_template, membership_template = self.pools, self.templates['club'], self.templates['membership']
+        name_length, location_length = Club._meta.get_field('name').max_length, Club._meta.get_field('location').max_length
+        officers = self.members_per_club // 10
+        clubs, memberships = [], []
+        for index in range(start, stop):
+            suffix = f' {index + 1}'
+            club_id = first_club_id + index
+            user_ids = [first_user_id + user_index for user_index in rng.sample(range(user_count), self.members_per_club)]
+            clubs.append(make_row(club_template, {
+                'id': club_id,
+                'name': rng.choice(pools['city'])[:name_length - len(suffix)] + suffix,
+                'description': rng.choice(pools['paragraph']),
+                'location': rng.choice(pools['city'])[:location_length],
+                'member_count': self.members_per_club,
+                'owner_id': user_ids[0] if user_ids else None,
+            }))
+            for position, user_id in enumerate(user_ids):
+                role = Membership.Role.OWNER if position == 0 else Membership.Role.OFFICER if position <= officers else Membership.Role.MEMBER
+                memberships.append(make_row(membership_template, {'user_id': user_id, 'club_id': club_id, 'role': role.value}))
+        return clubs, memberships
+
+def start_generator(*args):
+    global _generator
+    _generator = RowGenerator(*args)
+
+def generate(method, *args):
+    return getattr(_generator, method)(*args)
 
 class Command(BaseCommand):
     """The database seeder."""
-    def __init__(self):
-        super().__init__()
-        self.faker = Faker('en_GB')
+    help = ("Seed the demo accounts and clubs plus a generated dataset of any size. "
+        "Rows are generated by a pool of worker processes and inserted by this one. "
+        "The same --seed always generates the same users, clubs and memberships.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Number of users to generate.')
+        parser.add_argument('--clubs', type=int, default=10, help='Number of clubs to generate.')
+        parser.add_argument('--members-per-club', type=int, default=10, help='Memberships per generated club, including its owner.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed generates the same data.')
+        parser.add_argument('--batch-size', type=int, default=20000, help='Rows inserted per statement.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes generating rows.')
 
     def handle(self, *args, **options):
-        print('seeding data...')
-        self.generate_users()
-        self.generate_clubs()
-        self.generate_Membership()
-        print('done.')
-
-    def generate_users(self):
-        userList = []
-        jebediah = User.objects.create_user(
-            first_name = 'Jebediah',
-            last_name = 'Kerman',
-            username = 'jeb@example.org',
-            password = 'Password123',
-            bio = "My name is jeb",
-            statement = 'I guide others to treasure I cannot possess',
-            chess_xp = 1,
-        )
-
-        valentina = User.objects.create_user(
-            first_name = 'Valentina',
-            last_name = 'Kerman',
-            username = 'val@example.org',
-            password = 'Password123',
-            bio = "My name is val",
-            statement = 'I hate Tuesdays...',
-            chess_xp = 2
-        )
-
-        billie = User.objects.create_user(
-            first_name = 'Billie',
-            last_name = 'Kerman',
-            username = 'billie@example.org',
-            password = 'Password123',
-            bio = "Name's Bill",
-            statement = 'Zzz',
-            chess_xp = 3
-        )
-        owner1 = User.objects.create_user(
-            first_name = 'Bob',
-            last_name = 'Doe',
-            username = 'bob@example.org',
-            password = 'Password123',
-            bio = "Name's Bob",
-            statement = 'Whooo',
-            chess_xp = 10
-        )
-        owner2 = User.objects.create_user(
-            first_name = 'Jane',
-            last_name = 'Doe',
-            username = 'jane@example.org',
-            password = 'Password123',
-            bio = "Name's Jane",
-            statement = 'Thank you',
-            chess_xp = 40
-        )
-        userList.append(jebediah)
-        userList.append(valentina)
-        userList.append(billie)
-        userList.append(owner1)
-        userList.append(owner2)
-
-    def generate_clubs(self):
-        club_list = []
-        club1 = Club.objects.create(
-            name = 'Kerbal Chess Club',
-            description = 'This is kerbal chess club',
-            location = 'New york'
-        )
-        club2 = Club.objects.create(
-            name = 'The Grand',
-            description = 'This is the grand',
-            location = 'London'
-        )
-        club3 = Club.objects.create(
-            name = 'Club B',
-            description = 'This is club b',
-            location = 'Bristol'
-        )
-        club4 = Club.objects.create(
-            name = 'Dragonfly',
-            description = 'This is Dragonfly',
-            location = 'London'
-        )
-        club_list.append(club1)
-        club_list.append(club2)
-        club_list.append(club3)
-        club_list.append(club4)
-
-        for club in club_list:
-            print(club.name)
-            club.full_clean()
-            club.save()
-
-    def generate_Membership(self):
-        Membership.objects.create(
-            user = User.objects.get(username = 'jeb@example.org'),
-            club = Club.objects.get(name = 'Kerbal Chess Club'),
-            is_member= True,
-            is_applicant= True,
-            is_owner = False,
-            is_officer = False
-        )
-        Membership.objects.create(
-            user = User.objects.get(username = 'billie@example.org'),
-            club = Club.objects.get(name = 'Kerbal Chess Club'),
-            is_member= True,
-            is_applicant= True,
-            is_owner = True,
-            is_officer = True
-        )
-        Membership.objects.create(
-            user = User.objects.get(username = 'val@example.org'),
-            club = Club.objects.get(name = 'Kerbal Chess Club'),
-            is_member= True,
-            is_applicant= True,
-            is_owner = False,
-            is_officer = True
-        )
-        Membership.objects.create(
-            user = User.objects.get(username = 'jeb@example.org'),
-            club = Club.objects.get(name = 'The Grand'),
-            is_member= True,
-            is_applicant= True,
-            is_owner = False,
-            is_officer = True
-        )
-        Membership.objects.create(
-            user = User.objects.get(username = 'billie@example.org'),
-            club = Club.objects.get(name = 'Club B'),
-            is_member= True,
-            is_applicant= True,
-            is_owner = False,
-            is_officer = False
-        )
-        Membership.objects.create(
-            user = User.objects.get(username = 'val@example.org'),
-            club = Club.objects.get(name = 'Dragonfly'),
-            is_member= True,
-            is_applicant= True,
-            is_owner = True,
-            is_officer = True
-        )
-        Membership.objects.create(
-            user = User.objects.get(username = 'bob@example.org'),
-            club = Club.objects.get(name = 'The Grand'),
-            is_member= True,
-            is_applicant= True,
-            is_owner = True,
-            is_officer = True
-        )
-        Membership.objects.create(
-            user = User.objects.get(username = 'jane@example.org'),
-            club = Club.objects.get(name = 'Club B'),
-            is_member= True,
-            is_applicant= True,
-            is_owner = True,
-            is_officer = True
-        )
+        users, clubs, members_per_club = options['users'], options['clubs'], options['members_per_club']
+        if min(users, clubs, members_per_club) < 0 or options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('Counts must not be negative and the batch size and workers must be positive.')
+        if clubs and members_per_club > users:
+            raise CommandError('--members-per-club cannot exceed --users.')
+        if (users or clubs) and User.objects.filter(username__endswith = f'@{SEED_EMAIL_DOMAIN}').exists():
+            raise CommandError('Generated users already exist, run unseed first.')
+        self.batch_size = options['batch_size']
+        self.workers = options['workers']
+        self.password = make_password(DEMO_PASSWORD)
+        self.started = time.perf_counter()
+        self.rows_written = 0
+        now = timezone.now()
+        self.templates = {
+            'user': row_template(User, now, primary_key=True),
+            'club': row_template(Club, now, primary_key=True),
+            'membership': row_template(Membership, now),
+        }
+        generator = (options['seed'], faker_pools(options['seed']), self.password, self.templates, members_per_club)
+        if self.workers == 1:
+            self.pool = None
+            start_generator(*generator)
+        else:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=start_generator, initargs=generator)
+        try:
+            with transaction.atomic(), sqlite_cache(SQLITE_CACHE_KIB):
+                self.seed_demo_data()
+                first_user_id, first_club_id = self.next_id(User), self.next_id(Club)
+                self.write_users(users, first_user_id)
+                self.write_clubs(clubs, members_per_club, users, first_user_id, first_club_id)
+                self.reset_sequences()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+        elapsed = time.perf_counter() - self.started
+        self.report(f'Seeded {users} users, {clubs} clubs and {clubs * members_per_club} memberships: '
+            f'{self.rows_written} rows in {elapsed:.1f}s, {self.rows_written / max(elapsed, 1e-9):,.0f} rows/sec.')
+
+    def report(self, message):
+        self.stdout.write(f'[{time.perf_counter() - self.started:7.1f}s] {message}')
+
+    def seed_demo_data(self):
+        """Create the fixed demo accounts and clubs, all with the demo password, unless they already exist."""
+        if User.objects.filter(username__in = [user[2] for user in DEMO_USERS]).exists():
+            self.report('The demo accounts and clubs already exist, skipped them.')
+            return
+        for first_name, last_name, username, bio, statement, chess_xp in DEMO_USERS:
+            User.objects.create(first_name = first_name, last_name = last_name, username = username, password = self.password,
+                bio = bio, statement = statement, chess_xp = chess_xp)
+        for name, description, location in DEMO_CLUBS:
+            Club.objects.create(name = name, description = description, location = location)
+        for username, club_name, role in DEMO_MEMBERSHIPS:
+            Membership.objects.create(user = User.objects.get(username = username), club = Club.objects.get(name = club_name), role = role)
+        self.report('Created the demo accounts and clubs.')
+
+    def generated(self, tasks):
+        """Yield the results of generation tasks in order, keeping a couple of tasks per worker queued."""
+        if self.pool is None:
+            yield from (generate(*task) for task in tasks)
+            return
+        queued = deque()
+        for task in tasks:
+            queued.append(self.pool.submit(generate, *task))
+            if len(queued) > 2 * self.workers:
+                yield queued.popleft().result()
+        while queued:
+            yield queued.popleft().result()
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last = Max('pk'))['last'] or 0) + 1
+
+    def reset_sequences(self):
+        """Move the id sequences past the explicitly numbered users and clubs, on databases that have them."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [User, Club]):
+                cursor.execute(sql)
+
+    def insert(self, model, rows):
+        """Insert rows made by make_row for model, batch_size rows per statement."""
+        quote = connection.ops.quote_name
+        columns = [model._meta.get_field(attname).column for attname in self.templates[model._meta.model_name]]
+        sql = (f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(quote(column) for column in columns)}) '
+            f'VALUES ({", ".join(["%s"] * len(columns))})')
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                cursor.executemany(sql, rows[start:start + self.batch_size])
+        self.rows_written += len(rows)
+
+    def report_progress(self, what, done, count):
+        elapsed = time.perf_counter() - self.started
+        self.report(f'Created {done} of {count} {what}, {self.rows_written / max(elapsed, 1e-9):,.0f} rows/sec.')
+
+    def write_users(self, count, first_user_id):
+        """Insert count generated users with ids from first_user_id."""
+        tasks = [('users', chunk, start, min(start + GENERATION_CHUNK, count), first_user_id)
+            for chunk, start in enumerate(range(0, count, GENERATION_CHUNK))]
+        users, done = [], 0
+        for rows in self.generated(tasks):
+            users.extend(rows)
+            done += len(rows)
+            if len(users) >= self.batch_size or done == count:
+                self.insert(User, users)
+                users = []
+                self.report_progress('users', done, count)
+
+    def write_clubs(self, count, members_per_club, user_count, first_user_id, first_club_id):
+        """Insert count generated clubs with ids from first_club_id, and their memberships."""
+        clubs_per_chunk = max(1, GENERATION_CHUNK // max(1, members_per_club))
+        tasks = [('clubs', chunk, start, min(start + clubs_per_chunk, count), user_count, first_user_id, first_club_id)
+            for chunk, start in enumerate(range(0, count, clubs_per_chunk))]
+        clubs, memberships, done = [], [], 0
+        for club_rows, membership_rows in self.generated(tasks):
+            clubs.extend(club_rows)
+            memberships.extend(membership_rows)
+            done += len(club_rows)
+            if len(clubs) + len(memberships) >= self.batch_size or done == count:
+                self.insert(Club, clubs)
+                self.insert(Membership, memberships)
+                clubs, memberships = [], []
+                self.report_progress('clubs', done, count)
@@ -1,22 +1,24 @@
-from django.core.management.base import BaseCommand, CommandError
-from clubs.models import User,Club, Membership
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from clubs.context_processors import invalidate_joined_clubs
+from clubs.demo import SEED_EMAIL_DOMAIN
+from clubs.models import User, Club, Membership, ChangeCounter, delete_rows
 
 class Command(BaseCommand):
-        """The database unseeder."""
-        def __init__(self):
-            super().__init__()
+    """The database unseeder."""
+    help = "Delete every club, membership and user apart from the superusers."
 
-        def handle(self, *args, **options):
-            user_set = User.objects.all()
-            userClubs_set = Membership.objects.all()
-            club_set = Club.objects.all()
-
-            print('unseeding data...')
-            for user in user_set.iterator():
-                if user.is_superuser == False:
-                    user.delete()
-            for club in club_set.iterator():
-                club.delete()
-            for userClub in userClubs_set.iterator():
-                userClub.delete()
-            print('done.')
+    def handle(self, *args, **options):
+        self.stdout.write('unseeding data...')
+        with transaction.atomic():
+            # Memberships and clubs go with one DELETE each: their signals only
+            # maintain counters on the clubs being deleted alongside them.
+            memberships = delete_rows(Membership.objects.all())
+            clubs = delete_rows(Club.objects.all())
+            ChangeCounter.bump(ChangeCounter.CLUBS_DELETED)
+            # Generated users own no groups, permissions or admin log entries,
+            # so they need no cascade either; the few other users still get one.
+            users = delete_rows(User.objects.filter(username__endswith = f'@{SEED_EMAIL_DOMAIN}', is_superuser = False))
+            users += User.objects.filter(is_superuser = False).delete()[1].get(User._meta.label, 0)
+        invalidate_joined_clubs(*User.objects.values_list('pk', flat=True))
+        self.stdout.write(f'Deleted {users} users, {clubs} clubs and {memberships} memberships.')
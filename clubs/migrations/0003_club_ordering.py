@@ -0,0 +1,21 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0002_auto_20211216_1436'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='club',
+            options={'ordering': ['created_at', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='club',
+            index=models.Index(fields=['created_at', 'id'], name='clubs_club_created_9ab76b_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:48
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_memberships(apps, schema_editor):
+    """Keep the highest-ranked membership per (user, club) and the oldest owner per club."""
+    Membership = apps.get_model('clubs', 'Membership')
+    duplicates = (Membership.objects.values('user', 'club')
+        .annotate(rows=Count('id')).filter(rows__gt=1))
+    for duplicate in duplicates:
+        memberships = (Membership.objects.filter(user=duplicate['user'], club=duplicate['club'])
+            .order_by('-is_owner', '-is_officer', '-is_member', '-is_applicant', 'id'))
+        keep = memberships.first()
+        memberships.exclude(id=keep.id).delete()
+    owned_twice = (Membership.objects.filter(is_owner=True).values('club')
+        .annotate(rows=Count('id')).filter(rows__gt=1))
+    for club in owned_twice:
+        owners = Membership.objects.filter(club=club['club'], is_owner=True).order_by('id')
+        owners.exclude(id=owners.first().id).update(is_owner=False, is_officer=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0004_club_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_memberships, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['club', 'is_member'], name='membership_club_member_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['user', 'is_member'], name='membership_user_member_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['club', 'is_owner'], name='membership_club_owner_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='membership',
+            constraint=models.UniqueConstraint(fields=('user', 'club'), name='unique_membership'),
+        ),
+        migrations.AddConstraint(
+            model_name='membership',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_owner', True)), fields=('club',), name='one_owner_per_club'),
+        ),
+    ]
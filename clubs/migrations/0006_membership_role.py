@@ -0,0 +1,86 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:50
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+APPLICANT, MEMBER, OFFICER, OWNER = 1, 2, 3, 4
+
+
+def roles_from_flags(apps, schema_editor):
+    Membership = apps.get_model('clubs', 'Membership')
+    Membership.objects.update(role=Case(
+        When(is_owner=True, then=Value(OWNER)),
+        When(is_officer=True, then=Value(OFFICER)),
+        When(is_member=True, then=Value(MEMBER)),
+        default=Value(APPLICANT),
+    ))
+
+
+def flags_from_roles(apps, schema_editor):
+    Membership = apps.get_model('clubs', 'Membership')
+    Membership.objects.update(
+        is_applicant=True,
+        is_member=Case(When(role__gte=MEMBER, then=Value(True)), default=Value(False)),
+        is_officer=Case(When(role__gte=OFFICER, then=Value(True)), default=Value(False)),
+        is_owner=Case(When(role__gte=OWNER, then=Value(True)), default=Value(False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0005_membership_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='membership',
+            name='role',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Applicant'), (2, 'Member'), (3, 'Officer'), (4, 'Owner')], default=1),
+        ),
+        migrations.RunPython(roles_from_flags, flags_from_roles),
+        migrations.RemoveConstraint(
+            model_name='membership',
+            name='one_owner_per_club',
+        ),
+        migrations.RemoveIndex(
+            model_name='membership',
+            name='membership_club_member_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='membership',
+            name='membership_user_member_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='membership',
+            name='membership_club_owner_idx',
+        ),
+        migrations.RemoveField(
+            model_name='membership',
+            name='is_applicant',
+        ),
+        migrations.RemoveField(
+            model_name='membership',
+            name='is_member',
+        ),
+        migrations.RemoveField(
+            model_name='membership',
+            name='is_officer',
+        ),
+        migrations.RemoveField(
+            model_name='membership',
+            name='is_owner',
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['club', 'role'], name='membership_club_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['user', 'role'], name='membership_user_role_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='membership',
+            constraint=models.UniqueConstraint(condition=models.Q(('role', 4)), fields=('club',), name='one_owner_per_club'),
+        ),
+    ]
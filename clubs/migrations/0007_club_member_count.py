@@ -0,0 +1,33 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:51
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_members(apps, schema_editor):
+    Club = apps.get_model('clubs', 'Club')
+    Membership = apps.get_model('clubs', 'Membership')
+    members = (Membership.objects.filter(club=OuterRef('pk'), role__gte=2)
+        .order_by().values('club').annotate(total=Count('id')).values('total'))
+    Club.objects.update(member_count=Coalesce(Subquery(members, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0006_membership_role'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='club',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_members, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='club',
+            index=models.Index(fields=['member_count', 'id'], name='clubs_club_member__577b70_idx'),
+        ),
+    ]
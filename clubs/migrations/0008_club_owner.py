@@ -0,0 +1,29 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_owners(apps, schema_editor):
+    Club = apps.get_model('clubs', 'Club')
+    Membership = apps.get_model('clubs', 'Membership')
+    owners = Membership.objects.filter(club=OuterRef('pk'), role=4).values('user')[:1]
+    Club.objects.update(owner=Subquery(owners))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0007_club_member_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='club',
+            name='owner',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='owned_clubs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_owners, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.5 on 2026-10-18 17:56
+
+from hashlib import md5
+from django.db import migrations, models
+
+
+def hash_emails(apps, schema_editor):
+    User = apps.get_model('clubs', 'User')
+    batch = []
+    for user in User.objects.only('id', 'username').iterator(chunk_size=2000):
+        user.email_hash = md5(user.username.lower().strip().encode('utf-8')).hexdigest()
+        batch.append(user)
+        if len(batch) == 2000:
+            User.objects.bulk_update(batch, ['email_hash'])
+            batch = []
+    User.objects.bulk_update(batch, ['email_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0008_club_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(hash_emails, migrations.RunPython.noop),
+    ]
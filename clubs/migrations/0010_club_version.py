@@ -0,0 +1,18 @@
+# Generated by Django 3.2.5 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0009_user_email_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='club',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
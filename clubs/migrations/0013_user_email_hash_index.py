@@ -0,0 +1,17 @@
+# Generated by Django 3.2.5 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0012_changecounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['email_hash'], name='clubs_user_email_h_4eb28c_idx'),
+        ),
+    ]
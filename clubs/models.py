@@ -1,8 +1,35 @@
-from django.db import models
-from libgravatar import Gravatar
+from functools import lru_cache
+from urllib.parse import urlencode
+from django.db import connections, models, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.db.models import F
+from libgravatar import md5_hash, sanitize_email
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, RegexValidator
 
+def email_hash(email):
+    """Return the Gravatar hash of an email address."""
+    return md5_hash(sanitize_email(email))
+
+def delete_rows(queryset):
+    """Delete the rows of a queryset with a single DELETE and return how many went.
+
+    Unlike QuerySet.delete() the rows are not loaded, so no signals are sent
+    and nothing is cascaded: the caller sees to both."""
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    meta = queryset.model._meta
+    ids, params = queryset.values('pk').query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {quote(meta.db_table)} WHERE {quote(meta.pk.column)} IN ({ids})', params)
+        return cursor.rowcount
+
+@lru_cache(maxsize=8192)
+def gravatar_url(hashed_email, size):
+    """Return the Gravatar URL for an email hash, built once per hash and size."""
+    return f"https://www.gravatar.com/avatar/{hashed_email}?{urlencode({'size': size, 'default': 'mp'})}"
+
 class User(AbstractUser):
     """User model used for authentication and participating in clubs."""
 
@@ -12,35 +39,61 @@ class User(AbstractUser):
     bio = models.CharField(max_length=520, blank=True)
     statement = models.CharField(max_length=1000, blank=False)
     chess_xp = models.IntegerField(validators = [MinValueValidator(0)], default=0)
+    email_hash = models.CharField(max_length=32, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now = True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['email_hash']),
+        ]
 
     def full_name(self):
         return f'{self.first_name} {self.last_name}'
 
+    def save(self, *args, **kwargs):
+        """Save the user, refreshing the stored Gravatar hash of their username."""
+        self.email_hash = email_hash(self.username)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'username' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_hash'}
+        super().save(*args, **kwargs)
+
     def gravatar(self, size=120):
         """Return a URL to the user's gravatar."""
-        gravatar_object = Gravatar(self.username)
-        gravatar_url = gravatar_object.get_image(size=size, default='mp')
-        return gravatar_url
+        return gravatar_url(self.email_hash or email_hash(self.username), size)
 
     def mini_gravatar(self):
         """Return a URL to a miniature version of the user's gravatar."""
         return self.gravatar(size=60)
 
+    def avatar(self, size=120):
+        """Return a URL to the user's gravatar served through the local avatar proxy."""
+        return reverse('avatar', args=[self.email_hash or email_hash(self.username), size])
+
+    def mini_avatar(self):
+        """Return a URL to a miniature version of the user's proxied gravatar."""
+        return self.avatar(size=60)
+
     def __str__(self):
         return self.username
 
     def make_club_owner(self, new_club):
         """Make a new user club who is the owner of the specified club"""
-        club_user = Membership(user = self, club = new_club)
-        club_user.is_applicant = True
-        club_user.is_member = True
-        club_user.is_officer = True
-        club_user.is_owner = True
+        club_user = Membership(user = self, club = new_club, role = Membership.Role.OWNER)
         club_user.save()
 
     def apply_club(self, new_club):
-        club_user = Membership(user = self, club = new_club, is_applicant = True)
-        club_user.save()
+        """Apply to the specified club, unless already applied or a member"""
+        Membership.objects.get_or_create(user = self, club = new_club, defaults = {'role': Membership.Role.APPLICANT})
+
+class ClubQuerySet(models.QuerySet):
+    def with_owner(self):
+        """Fetch the owner user of every club in the same query as the clubs."""
+        return self.select_related('owner')
+
+    def bump_version(self):
+        """Invalidate the cached cards of every club in the queryset."""
+        return self.update(version = F('version') + 1, updated_at = timezone.now())
 
 class Club(models.Model):
     """Club model which can be joined by Users"""
@@ -48,41 +101,209 @@ class Club(models.Model):
     description = models.CharField(max_length=520, blank=True)
     location = models.CharField(max_length=20, blank=False)
     created_at = models.DateTimeField(auto_now_add = True)
+    updated_at = models.DateTimeField(auto_now = True)
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    owner = models.ForeignKey(User, null=True, blank=True, editable=False, on_delete=models.SET_NULL, related_name='owned_clubs')
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Columns maintained by queryset updates rather than by saving the club
+    DENORMALIZED_FIELDS = ('member_count', 'owner', 'version')
+
+    objects = ClubQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
-    class meta:
-        ordering = ['created_at']
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_name = instance.__dict__.get('name')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the club without overwriting the columns its memberships maintain."""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in Club.DENORMALIZED_FIELDS]
+        super().save(*args, **kwargs)
+        self._saved_name = self.name
+
+    @staticmethod
+    def add_members(club_id, count):
+        """Atomically add count (which may be negative) to a club's member_count."""
+        Club.objects.filter(pk = club_id).update(member_count = F('member_count') + count, updated_at = timezone.now())
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['member_count', 'id']),
+            models.Index(fields=['updated_at']),
+        ]
+
+class ChangeCounter(models.Model):
+    """A named counter for changes no updated_at column can record, such as deleted rows."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    # Bumped whenever a club is deleted, which leaves no newer updated_at behind
+    CLUBS_DELETED = 'clubs_deleted'
+
+    @classmethod
+    def bump(cls, name):
+        """Atomically add one to a counter, creating it on first use."""
+        if not cls.objects.filter(name = name).update(value = F('value') + 1):
+            counter, created = cls.objects.get_or_create(name = name, defaults = {'value': 1})
+            if not created:
+                cls.objects.filter(name = name).update(value = F('value') + 1)
+
+class OwnershipTransferError(Exception):
+    """Raised when ownership cannot be transferred because a membership's role has changed."""
+
+class MembershipQuerySet(models.QuerySet):
+    def applications(self):
+        """Return the pending applications: applicants who are not members yet."""
+        return self.filter(role = Membership.Role.APPLICANT)
+
+    def members(self):
+        """Return the memberships of members, officers and owners."""
+        return self.filter(role__gte = Membership.Role.MEMBER)
+
+    def approve(self):
+        """Make every pending application in the queryset a member and return how many were approved.
+
+        Each club's applications are approved by one UPDATE, which only matches
+        rows that are still applications, and the club's member_count grows by
+        the number of rows that UPDATE changed. An application approved or
+        rejected concurrently is therefore never counted twice, on any database
+        and without locking the rows first."""
+        applications = self.applications()
+        count = 0
+        with transaction.atomic():
+            for club_id in list(applications.order_by().values_list('club', flat=True).distinct()):
+                approved = applications.filter(club = club_id).update(role = Membership.Role.MEMBER, updated_at = timezone.now())
+                if approved:
+                    Club.add_members(club_id, approved)
+                count += approved
+        return count
+
+    def reject(self):
+        """Delete every pending application in the queryset with a single DELETE and return how many went.
+
+        QuerySet.delete() loads every row to send the post_delete signals the
+        membership receivers listen to. Those receivers only adjust member_count
+        and owner, which applicants count towards in no club, so the rows are
+        deleted by delete_rows instead; the caller forgets the users' cached clubs."""
+        return delete_rows(self.applications())
+
+def role_flag(role):
+    """Boolean view of the role column: true when the membership holds the role or a higher one."""
+    def get_flag(self):
+        return self.role >= role
+
+    def set_flag(self, value):
+        if value:
+            self.role = max(self.role, role)
+        else:
+            self.role = max(min(self.role, role - 1), Membership.Role.APPLICANT)
+    return property(get_flag, set_flag)
 
 class Membership(models.Model):
     """A Membership Model is to maintain the many to many reletionships
        as well as to create the User access rights - Owner,member,officier"""
+
+    class Role(models.IntegerChoices):
+        """Ranked roles, so "officer or above" is a single range comparison."""
+        APPLICANT = 1
+        MEMBER = 2
+        OFFICER = 3
+        OWNER = 4
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     club = models.ForeignKey(Club, on_delete=models.CASCADE)
-    is_applicant = models.BooleanField(default=False)
-    is_member = models.BooleanField(default=False)
-    is_officer = models.BooleanField(default=False)
-    is_owner = models.BooleanField(default=False)
+    role = models.PositiveSmallIntegerField(choices=Role.choices, default=Role.APPLICANT)
+    updated_at = models.DateTimeField(auto_now = True)
+
+    is_applicant = role_flag(Role.APPLICANT)
+    is_member = role_flag(Role.MEMBER)
+    is_officer = role_flag(Role.OFFICER)
+    is_owner = role_flag(Role.OWNER)
+
+    objects = MembershipQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_role = instance.__dict__.get('role')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the membership, keeping the club's member_count and owner in step with its role."""
+        saved_role = getattr(self, '_saved_role', None) or 0
+        was_member = saved_role >= Membership.Role.MEMBER
+        was_owner = saved_role >= Membership.Role.OWNER
+        club_changes = {}
+        if self.is_member != was_member:
+            club_changes['member_count'] = F('member_count') + (1 if self.is_member else -1)
+        if self.is_owner and not was_owner:
+            club_changes['owner'] = self.user_id
+            club_changes['version'] = F('version') + 1
+        if self.role != saved_role and max(self.role, saved_role) >= Membership.Role.MEMBER:
+            # The roster shows members' roles and is validated by the club's updated_at
+            club_changes['updated_at'] = timezone.now()
+        if club_changes:
+            club_changes['updated_at'] = timezone.now()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if was_owner and not self.is_owner:
+                Club.objects.filter(pk = self.club_id, owner = self.user_id).update(owner = None, version = F('version') + 1, updated_at = timezone.now())
+            if club_changes:
+                Club.objects.filter(pk = self.club_id).update(**club_changes)
+        self._saved_role = self.role
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'club'], name='unique_membership'),
+            models.UniqueConstraint(fields=['club'], condition=models.Q(role=4), name='one_owner_per_club'), # Role.OWNER
+        ]
+        indexes = [
+            models.Index(fields=['club', 'role'], name='membership_club_role_idx'),
+            models.Index(fields=['user', 'role'], name='membership_user_role_idx'),
+        ]
 
     def promote_member(self, user):
-        user.is_officer = True
-        user.save()
+        """Make a plain member an officer; applicants, officers and the owner are left as they are."""
+        if user.role == Membership.Role.MEMBER:
+            user.role = Membership.Role.OFFICER
+            user.save()
 
     def demote_officer(self, user):
-        user.is_officer = False
-        user.save()
+        """Make an officer a plain member; the owner's row is never touched, so the club keeps its owner."""
+        if user.role == Membership.Role.OFFICER:
+            user.role = Membership.Role.MEMBER
+            user.save()
 
     def transfer_ownership(self, user):
-        self.is_owner = False
-        user.is_owner = True
-        self.save()
-        user.save()
+        """Hand ownership to an officer of the same club in one transaction.
+
+        Each row is changed by a conditional UPDATE of the role column only, so
+        a concurrent change leaves the club with exactly one owner and raises
+        OwnershipTransferError instead."""
+        with transaction.atomic():
+            demoted = (Membership.objects.filter(pk = self.pk, role = Membership.Role.OWNER)
+                .update(role = Membership.Role.OFFICER, updated_at = timezone.now()))
+            promoted = demoted and (Membership.objects.filter(pk = user.pk, club = self.club_id, role = Membership.Role.OFFICER)
+                .update(role = Membership.Role.OWNER, updated_at = timezone.now()))
+            if not promoted:
+                raise OwnershipTransferError('Ownership can only pass from the owner to an officer of the same club.')
+            Club.objects.filter(pk = self.club_id).update(owner = user.user_id, version = F('version') + 1, updated_at = timezone.now())
+        self.role = self._saved_role = Membership.Role.OFFICER
+        user.role = user._saved_role = Membership.Role.OWNER
 
     def approve_application(self,user):
         user.is_member = True
         user.save()
 
     def reject_application(self,user):
-        if user.is_member == False and user.is_applicant == True:
+        if user.role == Membership.Role.APPLICANT:
             user.delete()
@@ -0,0 +1,155 @@
+"""Keyset (cursor) pagination for the clubs app.
+
+Pages are selected with a WHERE clause on the ordering keys of the last
+row shown instead of an OFFSET, so fetching any page costs the same no
+matter how deep into the result set it is."""
+import base64
+import datetime
+import json
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or its values do not fit the ordering keys."""
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder keeping full microsecond precision, so cursors compare exactly."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+def encode_cursor(values):
+    """Return an opaque, URL safe cursor for a tuple of key values."""
+    data = json.dumps(list(values), cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, key_count):
+    """Return the key values stored in a cursor made by encode_cursor."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError) as error:
+        raise InvalidCursor(cursor) from error
+    if not isinstance(values, list) or len(values) != key_count:
+        raise InvalidCursor(cursor)
+    return values
+
+def clamp_page_size(value, default, maximum):
+    """Return a page size parsed from a query parameter within [1, maximum]."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+class KeysetPage:
+    """A page of results plus the cursor of the following page, if any."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+class KeysetStream:
+    """A page of results read lazily in chunks; next_cursor is set once it has been iterated."""
+
+    def __init__(self, paginator, rows):
+        self.paginator = paginator
+        self.rows = rows
+        self.next_cursor = None
+
+    def __iter__(self):
+        last = None
+        for position, row in enumerate(self.rows, 1):
+            if position > self.paginator.page_size:
+                self.next_cursor = encode_cursor(self.paginator._key_values(last))
+                break
+            yield row
+            last = row
+
+def key_field(model, key):
+    """Return the model field an ordering key such as 'user__first_name' refers to."""
+    *relations, name = key.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+class KeysetPaginator:
+    """Paginate a queryset over a unique ordering, e.g. ('created_at', 'id').
+
+    Keys prefixed with '-' are ordered descending. The last key must be
+    unique so that every row has a distinct position."""
+
+    def __init__(self, queryset, keys, page_size):
+        self.queryset = queryset.order_by(*keys)
+        self.keys = keys
+        self.page_size = page_size
+        self.key_fields = [key_field(queryset.model, key.lstrip('-')) for key in keys]
+
+    def _after(self, values):
+        """Return a filter matching the rows that sort after the given key values."""
+        condition = Q()
+        for index in reversed(range(len(self.keys))):
+            field = self.keys[index].lstrip('-')
+            lookup = 'lt' if self.keys[index].startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            if index < len(self.keys) - 1:
+                step |= Q(**{field: values[index]}) & condition
+            condition = step
+        return condition
+
+    def _key_values(self, row):
+        names = [key.lstrip('-') for key in self.keys]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        values = []
+        for name in names:
+            value = row
+            for attribute in name.split('__'):
+                value = getattr(value, attribute)
+            values.append(value)
+        return values
+
+    def _cursor_values(self, cursor):
+        """Return the key values of a cursor converted by their fields, e.g. a date string to a datetime."""
+        values = decode_cursor(cursor, len(self.keys))
+        try:
+            return [field.to_python(value) for field, value in zip(self.key_fields, values)]
+        except (ValidationError, ValueError, TypeError) as error:
+            raise InvalidCursor(cursor) from error
+
+    def _page_queryset(self, cursor):
+        queryset = self.queryset
+        if cursor:
+            values = self._cursor_values(cursor)
+            if None in values:
+                raise InvalidCursor(cursor)
+            queryset = queryset.filter(self._after(values))
+        return queryset[:self.page_size + 1]
+
+    def page(self, cursor=None):
+        """Return the page following the cursor, or the first page if it is empty."""
+        rows = list(self._page_queryset(cursor))
+        next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            next_cursor = encode_cursor(self._key_values(rows[-1]))
+        return KeysetPage(rows, next_cursor)
+
+    def stream(self, cursor=None, chunk_size=100):
+        """Return the page following the cursor as a KeysetStream fetching chunk_size rows at a time.
+
+        The cursor is decoded straight away, so InvalidCursor is raised here
+        rather than part way through the stream."""
+        return KeysetStream(self, self._page_queryset(cursor).iterator(chunk_size))
@@ -0,0 +1,86 @@
+"""On-demand cProfile runs of single requests, for staff.
+
+A staff user adds ?profile=1 to a URL, or sends an X-Profile: 1 header, and
+that one request runs under cProfile, streamed content included. The profile
+is saved to PROFILE_DIR, which keeps the newest PROFILE_RETENTION files, and
+the response is replaced by a plain text report of the top
+PROFILE_TOP_ENTRIES functions by cumulative time. Saved profiles can be
+explored with python -m pstats or snakeviz.
+
+cProfile only follows the thread that enabled it, so requests served at the
+same time by other threads are not affected. Requests without the switch
+cost a dictionary lookup; the user is only checked when it is present."""
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+from pathlib import Path
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+
+def profile_requested(request):
+    """Return whether the request asks to be profiled and comes from a staff user."""
+    if request.GET.get('profile') != '1' and request.META.get('HTTP_X_PROFILE') != '1':
+        return False
+    return request.user.is_authenticated and request.user.is_staff
+
+def profile_name(request):
+    match = request.resolver_match
+    view_name = re.sub(r'[^\w-]', '_', match.view_name) if match else 'unresolved'
+    return f'{timezone.now():%Y%m%dT%H%M%S%f}-{view_name}-{request.user.pk}.prof'
+
+def prune_profiles(directory, retention):
+    """Delete all but the newest retention profiles in a directory."""
+    profiles = sorted(Path(directory).glob('*.prof'), key=lambda path: (path.stat().st_mtime, path.name), reverse=True)
+    for path in profiles[retention:]:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+def save_profile(profiler, request):
+    """Save a profile to PROFILE_DIR, pruning the oldest, and return its path."""
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / profile_name(request)
+    profiler.dump_stats(path)
+    prune_profiles(directory, settings.PROFILE_RETENTION)
+    return path
+
+def profile_report(profiler, request, response, size, elapsed, path):
+    """Return the plain text report of a profiled request."""
+    stream = io.StringIO()
+    stream.write(f'Profiled {request.method} {request.get_full_path()} for {request.user.username}: '
+        f'status {response.status_code}, {size} bytes in {elapsed:.3f}s.\n')
+    stream.write(f'Saved to {path}.\n\n')
+    pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats('cumulative').print_stats(settings.PROFILE_TOP_ENTRIES)
+    return stream.getvalue()
+
+class ProfilingMiddleware:
+    """Profile requests that ask for it, from staff users; it must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profile_requested(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+        response.close()
+        path = save_profile(profiler, request)
+        report = HttpResponse(profile_report(profiler, request, response, len(content), elapsed, path),
+            content_type='text/plain; charset=utf-8')
+        report['X-Profile-File'] = os.path.basename(path)
+        report['Cache-Control'] = 'no-store'
+        return report
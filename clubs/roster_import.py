@@ -0,0 +1,161 @@
+"""Batched import of club rosters from CSV.
+
+Rows are validated with the sign up rules of RosterRowForm, then written a
+batch at a time: one query finds which emails already have accounts, new
+users and the memberships are created with bulk_create, and the club's
+member_count is adjusted once, all inside one transaction per batch. Rows
+matching an existing account only make that person an applicant, whatever
+their role column says, since nobody may be enrolled without consent; the
+rest of such a row is ignored and the row reported. The
+column headings of the roster export are accepted, so an exported roster
+can be imported into another club."""
+import csv
+import io
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from clubs.forms import RosterRowForm
+from clubs.models import Club, Membership, User, email_hash
+
+# Rows written per transaction, small enough for the IN lists of older SQLite builds
+IMPORT_BATCH_SIZE = 500
+
+ROLES = {
+    'applicant': Membership.Role.APPLICANT,
+    'member': Membership.Role.MEMBER,
+    'officer': Membership.Role.OFFICER,
+}
+
+class RosterImportResult:
+    """Counts of what an import created, the errors of each rejected row and
+    the rows that matched existing accounts, by line number."""
+
+    def __init__(self):
+        self.users_created = 0
+        self.memberships_created = 0
+        self.errors = []
+        self.existing_accounts = []
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+    def add_existing_account(self, line, username):
+        self.existing_accounts.append((line, username))
+
+def heading_key(heading):
+    """Return the row key for a CSV heading, e.g. "First name" -> "first_name"."""
+    return (heading or '').strip().lower().replace(' ', '_')
+
+def read_roster(file):
+    """Yield (line number, row dict) for each row of a CSV file opened in text mode."""
+    reader = csv.DictReader(file)
+    reader.fieldnames = [heading_key(heading) for heading in reader.fieldnames or []]
+    for row in reader:
+        yield reader.line_num, row
+
+def read_uploaded_roster(uploaded_file):
+    """Yield the rows of an uploaded CSV file, which may start with a byte order mark."""
+    return read_roster(io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline=''))
+
+def row_data(row):
+    """Return RosterRowForm data for a CSV row."""
+    password = (row.get('password') or '').strip()
+    return {
+        'first_name': row.get('first_name', ''),
+        'last_name': row.get('last_name', ''),
+        'username': row.get('email') or row.get('username', ''),
+        'new_password': password,
+        'password_confirmation': password,
+        'bio': row.get('bio', ''),
+        'statement': row.get('statement', ''),
+        'chess_xp': row.get('chess_xp', ''),
+        'role': (row.get('role') or '').strip().lower(),
+    }
+
+def form_errors(form):
+    return '; '.join(f'{field}: {" ".join(messages)}' for field, messages in form.errors.items())
+
+class RosterImporter:
+    """Import rows into a club, batch_size rows per transaction."""
+
+    def __init__(self, club, batch_size=IMPORT_BATCH_SIZE):
+        self.club = club
+        self.batch_size = batch_size
+        self.result = RosterImportResult()
+        self._seen = set()
+        self._password_hashes = {}
+        self._form = RosterRowForm()
+
+    def run(self, rows):
+        """Import (line number, row dict) pairs and return the RosterImportResult."""
+        batch = []
+        for line, row in rows:
+            data = self._validate(line, row)
+            if data is not None:
+                batch.append((line, data))
+            if len(batch) == self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        return self.result
+
+    def _validate(self, line, row):
+        form = self._form.rebind(row_data(row))
+        if not form.is_valid():
+            self.result.add_error(line, form_errors(form))
+            return None
+        data = form.cleaned_data
+        username = data['username']
+        if username in self._seen:
+            self.result.add_error(line, f'username: {username} appears earlier in the file.')
+            return None
+        self._seen.add(username)
+        return data
+
+    def _password_hash(self, password):
+        """Hash each distinct password once, since hashing dominates the cost of creating users."""
+        if password not in self._password_hashes:
+            self._password_hashes[password] = make_password(password or None)
+        return self._password_hashes[password]
+
+    def _import_batch(self, batch):
+        usernames = [data['username'] for line, data in batch]
+        with transaction.atomic():
+            user_ids = dict(User.objects.filter(username__in = usernames).values_list('username', 'id'))
+            new_users = [self._new_user(data) for line, data in batch if data['username'] not in user_ids]
+            User.objects.bulk_create(new_users, batch_size=self.batch_size)
+            existing_user_ids = set(user_ids.values())
+            user_ids.update(User.objects.filter(username__in = [user.username for user in new_users]).values_list('username', 'id'))
+            already_joined = set(Membership.objects.filter(club = self.club, user_id__in = existing_user_ids).values_list('user_id', flat=True))
+            memberships = []
+            for line, data in batch:
+                user_id = user_ids[data['username']]
+                if user_id in already_joined:
+                    self.result.add_error(line, f'username: {data["username"]} already belongs to {self.club.name}.')
+                elif user_id in existing_user_ids:
+                    self.result.add_existing_account(line, data['username'])
+                    memberships.append(Membership(user_id = user_id, club = self.club, role = Membership.Role.APPLICANT))
+                else:
+                    memberships.append(Membership(user_id = user_id, club = self.club, role = ROLES[data['role']]))
+            Membership.objects.bulk_create(memberships, batch_size=self.batch_size)
+            members = sum(1 for membership in memberships if membership.is_member)
+            if members:
+                Club.add_members(self.club.pk, members)
+        self.result.users_created += len(new_users)
+        self.result.memberships_created += len(memberships)
+
+    def _new_user(self, data):
+        return User(
+            username = data['username'],
+            email_hash = email_hash(data['username']),
+            first_name = data['first_name'],
+            last_name = data['last_name'],
+            bio = data['bio'],
+            statement = data['statement'],
+            chess_xp = data['chess_xp'],
+            password = self._password_hash(data['new_password']),
+        )
+
+def import_roster(club, rows, batch_size=IMPORT_BATCH_SIZE):
+    """Import (line number, row dict) pairs into a club and return the RosterImportResult."""
+    return RosterImporter(club, batch_size).run(rows)
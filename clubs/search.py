@@ -0,0 +1,118 @@
+"""Full-text search over clubs.
+
+On SQLite clubs are indexed in an FTS5 virtual table kept in sync with the
+clubs_club table by triggers, and results are ranked with bm25. Other
+databases fall back to a case-insensitive scan ordered by name."""
+import re
+from django.db import connection
+from django.db.models import Q
+from clubs.models import Club
+from clubs.pagination import KeysetPage, KeysetPaginator, decode_cursor, encode_cursor
+
+SEARCH_TABLE = 'clubs_club_fts'
+
+# Column weights for bm25, in the order name, description, location
+SEARCH_WEIGHTS = (10.0, 1.0, 5.0)
+
+SEARCH_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        name, description, location, content='clubs_club', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON clubs_club BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, description, location)
+        VALUES (new.id, new.name, new.description, new.location);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON clubs_club BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description, location)
+        VALUES ('delete', old.id, old.name, old.description, old.location);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF name, description, location ON clubs_club BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description, location)
+        VALUES ('delete', old.id, old.name, old.description, old.location);
+        INSERT INTO {SEARCH_TABLE}(rowid, name, description, location)
+        VALUES (new.id, new.name, new.description, new.location);
+    END""",
+]
+
+SEARCH_TRIGGERS = [f'{SEARCH_TABLE}_insert', f'{SEARCH_TABLE}_delete', f'{SEARCH_TABLE}_update']
+
+def search_index_supported(using_connection=connection):
+    """Return whether the database can hold the FTS5 search index."""
+    return using_connection.vendor == 'sqlite'
+
+def install_search_index(using_connection=connection):
+    """Create the FTS5 table and its triggers if missing, rebuilding the index when anything was created.
+
+    SQLite drops a table's triggers whenever a migration rebuilds it, so this
+    also runs after every migrate to put them back."""
+    if not search_index_supported(using_connection):
+        return False
+    if Club._meta.db_table not in using_connection.introspection.table_names():
+        return False
+    with using_connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [SEARCH_TABLE, *SEARCH_TRIGGERS]
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if len(existing) == len(SEARCH_TRIGGERS) + 1:
+            return False
+        for statement in SEARCH_INDEX_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    return True
+
+def remove_search_index(using_connection=connection):
+    """Drop the FTS5 table and its triggers."""
+    if not search_index_supported(using_connection):
+        return
+    with using_connection.cursor() as cursor:
+        for trigger in SEARCH_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+def search_terms(query):
+    """Return the words of a user query, stripped of search syntax."""
+    return re.findall(r'\w+', query)
+
+def match_expression(terms):
+    """Return an FTS5 query matching every term as a prefix."""
+    return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+def search_clubs(query, cursor=None, page_size=20):
+    """Return a page of clubs matching the query, best matches first.
+
+    Raises InvalidCursor if the cursor cannot be decoded."""
+    terms = search_terms(query)
+    if not terms:
+        return KeysetPage([], None)
+    if not search_index_supported():
+        return _scan_clubs(terms, cursor, page_size)
+    sql = f"""SELECT id, score FROM (
+            SELECT rowid AS id, bm25({SEARCH_TABLE}, %s, %s, %s) AS score
+            FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s
+        )"""
+    params = [*SEARCH_WEIGHTS, match_expression(terms)]
+    if cursor:
+        score, club_id = decode_cursor(cursor, 2)
+        sql += ' WHERE score > %s OR (score = %s AND id > %s)'
+        params += [score, score, club_id]
+    sql += ' ORDER BY score, id LIMIT %s'
+    params.append(page_size + 1)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        club_id, score = rows[-1]
+        next_cursor = encode_cursor([score, club_id])
+    clubs = Club.objects.with_owner().in_bulk([club_id for club_id, score in rows])
+    return KeysetPage([clubs[club_id] for club_id, score in rows if club_id in clubs], next_cursor)
+
+def _scan_clubs(terms, cursor, page_size):
+    """Match clubs containing every term without an index."""
+    clubs = Club.objects.with_owner()
+    for term in terms:
+        clubs = clubs.filter(Q(name__icontains = term) | Q(description__icontains = term) | Q(location__icontains = term))
+    return KeysetPaginator(clubs, ('name', 'id'), page_size).page(cursor)
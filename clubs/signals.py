@@ -0,0 +1,57 @@
+"""Signal handlers keeping cached and denormalized club data in step with the database."""
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from clubs.context_processors import invalidate_joined_clubs, joined_clubs_cache_enabled
+from clubs.models import ChangeCounter, Club, Membership, User
+from clubs.search import install_search_index
+
+@receiver([post_save, post_delete], sender=Membership)
+def membership_changed(sender, instance, **kwargs):
+    """Forget the cached "My Clubs" list of the user whose membership changed."""
+    invalidate_joined_clubs(instance.user_id)
+
+@receiver(post_delete, sender=Membership)
+def membership_deleted(sender, instance, **kwargs):
+    """Take a deleted member, e.g. one whose user was deleted, off the club's member_count and owner."""
+    if instance.is_owner:
+        Club.objects.filter(pk = instance.club_id, owner = instance.user_id).update(owner = None, version = F('version') + 1, updated_at = timezone.now())
+    if instance.is_member:
+        Club.add_members(instance.club_id, -1)
+
+@receiver(post_save, sender=Club)
+def club_changed(sender, instance, created, **kwargs):
+    """Invalidate the cached card of an edited club, and the cached "My Clubs" lists of its members when it was renamed."""
+    if not created:
+        Club.objects.filter(pk = instance.pk).bump_version()
+        if instance.name != getattr(instance, '_saved_name', None) and joined_clubs_cache_enabled():
+            invalidate_joined_clubs(*Membership.objects.filter(club = instance).values_list('user_id', flat=True))
+
+@receiver(post_delete, sender=Club)
+def club_deleted(sender, instance, **kwargs):
+    """Count the deletion, which leaves no newer updated_at behind for the club list's ETag."""
+    ChangeCounter.bump(ChangeCounter.CLUBS_DELETED)
+
+# User fields shown on the cards of the clubs they own
+CLUB_CARD_OWNER_FIELDS = {'username', 'first_name', 'last_name'}
+
+# User fields shown on the member rosters of the clubs they belong to
+ROSTER_MEMBER_FIELDS = {'username', 'email_hash', 'first_name', 'last_name', 'bio', 'statement', 'chess_xp'}
+
+@receiver(post_save, sender=User)
+def owner_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Invalidate the cached cards of the clubs owned by a user whose name may have changed,
+    and touch the clubs whose rosters show the user so their ETags change."""
+    if created:
+        return
+    changed = ROSTER_MEMBER_FIELDS if update_fields is None else ROSTER_MEMBER_FIELDS & set(update_fields)
+    if CLUB_CARD_OWNER_FIELDS & changed:
+        Club.objects.filter(owner = instance).bump_version()
+    if changed:
+        Club.objects.filter(membership__user = instance, membership__role__gte = Membership.Role.MEMBER).update(updated_at = timezone.now())
+
+def restore_search_index(sender, using, **kwargs):
+    """Recreate the club search triggers SQLite drops when a migration rebuilds clubs_club."""
+    install_search_index(connections[using])
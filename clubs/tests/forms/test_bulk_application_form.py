@@ -0,0 +1,38 @@
+"""Unit tests of the bulk application form."""
+from django.test import TestCase
+from clubs.forms import BulkApplicationForm
+
+class BulkApplicationFormTestCase(TestCase):
+    """Unit tests of the bulk application form."""
+
+    def setUp(self):
+        self.form_input = {'action': 'approve', 'applications': ['1', '2']}
+
+    def test_form_contains_required_fields(self):
+        form = BulkApplicationForm()
+        self.assertIn('action', form.fields)
+        self.assertIn('applications', form.fields)
+        self.assertIn('select_all', form.fields)
+
+    def test_form_accepts_valid_input(self):
+        form = BulkApplicationForm(data=self.form_input)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data.get('applications'), [1, 2])
+
+    def test_form_accepts_select_all_without_applications(self):
+        form = BulkApplicationForm(data={'action': 'reject', 'select_all': 'on'})
+        self.assertTrue(form.is_valid())
+
+    def test_form_rejects_unknown_action(self):
+        self.form_input['action'] = 'promote'
+        form = BulkApplicationForm(data=self.form_input)
+        self.assertFalse(form.is_valid())
+
+    def test_form_rejects_invalid_ids(self):
+        self.form_input['applications'] = ['1', 'abc']
+        form = BulkApplicationForm(data=self.form_input)
+        self.assertFalse(form.is_valid())
+
+    def test_form_rejects_empty_selection(self):
+        form = BulkApplicationForm(data={'action': 'approve'})
+        self.assertFalse(form.is_valid())
@@ -0,0 +1,50 @@
+"""Unit tests of the roster row form."""
+from django.test import TestCase
+from clubs.forms import RosterRowForm
+
+class RosterRowFormTestCase(TestCase):
+    """Unit tests of the roster row form."""
+
+    fixtures = ['clubs/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.form_input = {
+            'first_name': 'Ann',
+            'last_name': 'Smith',
+            'username': 'ann@example.org',
+            'new_password': '',
+            'password_confirmation': '',
+            'bio': '',
+            'statement': 'Hi',
+            'chess_xp': '',
+            'role': '',
+        }
+
+    def test_form_accepts_row_without_password_or_role(self):
+        form = RosterRowForm(data=self.form_input)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data.get('role'), 'member')
+        self.assertEqual(form.cleaned_data.get('chess_xp'), 0)
+
+    def test_form_applies_sign_up_password_rules(self):
+        self.form_input['new_password'] = self.form_input['password_confirmation'] = 'password'
+        form = RosterRowForm(data=self.form_input)
+        self.assertFalse(form.is_valid())
+        self.assertIn('new_password', form.errors)
+
+    def test_form_rejects_owner_role(self):
+        self.form_input['role'] = 'owner'
+        form = RosterRowForm(data=self.form_input)
+        self.assertFalse(form.is_valid())
+
+    def test_form_leaves_email_uniqueness_to_the_importer(self):
+        self.form_input['username'] = 'janedoe@example.org'
+        form = RosterRowForm(data=self.form_input)
+        self.assertTrue(form.is_valid())
+
+    def test_rebind_validates_another_row(self):
+        form = RosterRowForm(data=self.form_input)
+        self.assertTrue(form.is_valid())
+        form.rebind({**self.form_input, 'username': 'not-an-email'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('username', form.errors)
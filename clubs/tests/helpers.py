@@ -8,3 +8,44 @@ def reverse_with_next(url_name, next_url):
 class LogInTester:
     def _is_logged_in(self):
         return '_auth_user_id' in self.client.session.keys()
+
+class AvatarStubServer:
+    """Local HTTP server standing in for Gravatar, serving one image for every hash except the missing one."""
+
+    image = b'\x89PNG\r\n\x1a\nstub'
+    missing_hash = 'f' * 32
+
+    def __init__(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                if server.missing_hash in self.path:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/png')
+                self.send_header('Content-Length', str(len(server.image)))
+                self.end_headers()
+                self.wfile.write(server.image)
+
+            def log_message(self, *args):
+                pass
+
+        self.requests = []
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+
+    @property
+    def upstream_url(self):
+        host, port = self.httpd.server_address
+        return f'http://{host}:{port}/avatar/{{hash}}?size={{size}}'
+
+    def start(self):
+        import threading
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
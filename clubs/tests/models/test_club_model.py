@@ -61,6 +61,13 @@ class ClubModelTestCase(TestCase):
         self.club.name = second_club.name
         self._assert_club_is_invalid()
 
+    def test_saving_a_club_bumps_its_version(self):
+        version = self.club.version
+        self.club.description = 'Changed'
+        self.club.save()
+        self.club.save()
+        self.assertEqual(Club.objects.get(pk = self.club.pk).version, version + 2)
+
     def _assert_club_is_valid(self):
         try:
             self.club.full_clean()
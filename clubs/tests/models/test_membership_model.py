@@ -1,7 +1,8 @@
 """Unit tests for the Club model."""
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.test import TestCase
-from clubs.models import Membership, User, Club
+from clubs.models import Membership, OwnershipTransferError, User, Club
 from django.utils import timezone
 
 class MembershipTestCase(TestCase):
@@ -33,7 +34,22 @@ class MembershipTestCase(TestCase):
         self.assertTrue(beforeOfficer)
         self.assertFalse(afterOfficer)
 
+    def test_demote_officer_leaves_the_owner_alone(self):
+        self.owner.demote_officer(self.owner)
+        self.owner.refresh_from_db()
+        self.assertTrue(self.owner.is_owner)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).owner, self.user)
+
+    def test_promote_member_only_promotes_plain_members(self):
+        self.other_member.role = Membership.Role.APPLICANT
+        self.other_member.save()
+        self.owner.promote_member(self.other_member)
+        self.assertEqual(Membership.objects.get(pk = self.other_member.pk).role, Membership.Role.APPLICANT)
+        self.owner.promote_member(self.owner)
+        self.assertEqual(Membership.objects.get(pk = self.owner.pk).role, Membership.Role.OWNER)
+
     def test_transfer_ownership(self):
+        self.owner.promote_member(self.other_member)
         beforeOwner = self.owner.is_owner
         beforeOtherMemberOwner = self.other_member.is_owner
         self.owner.transfer_ownership(self.other_member)
@@ -44,6 +60,41 @@ class MembershipTestCase(TestCase):
         self.assertFalse(afterOwner)
         self.assertTrue(afterOtherMemberOwner)
 
+    def test_transfer_ownership_to_a_member_fails(self):
+        with self.assertRaises(OwnershipTransferError):
+            self.owner.transfer_ownership(self.other_member)
+        self.owner.refresh_from_db()
+        self.other_member.refresh_from_db()
+        self.assertTrue(self.owner.is_owner)
+        self.assertFalse(self.other_member.is_owner)
+
+    def test_transfer_ownership_from_a_former_owner_fails(self):
+        self.owner.promote_member(self.other_member)
+        stale_owner = Membership.objects.get(pk = self.owner.pk)
+        self.owner.transfer_ownership(self.other_member)
+        with self.assertRaises(OwnershipTransferError):
+            stale_owner.transfer_ownership(self.other_member)
+        self.assertEqual(Membership.objects.filter(club = self.club, role = Membership.Role.OWNER).count(), 1)
+
+    def test_transfer_ownership_only_updates_roles(self):
+        self.owner.promote_member(self.other_member)
+        with self.assertNumQueries(5) as queries:
+            self.owner.transfer_ownership(self.other_member)
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "clubs_membership"')]
+        self.assertEqual(len(updates), 2)
+        for update in updates:
+            self.assertIn('SET "role" =', update)
+            self.assertNotIn('"user_id" =', update.split('WHERE')[0])
+
+    def test_owner_changes_bump_club_version(self):
+        version = Club.objects.get(pk = self.club.pk).version
+        self.owner.promote_member(self.other_member)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).version, version)
+        self.owner.transfer_ownership(self.other_member)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).version, version + 1)
+        self.other_member.delete()
+        self.assertEqual(Club.objects.get(pk = self.club.pk).version, version + 2)
+
     def test_approve_application(self):
         self.other_member.is_member = False
         beforeMember = self.other_member.is_member
@@ -76,3 +127,36 @@ class MembershipTestCase(TestCase):
         self.club.delete()
         afterCount = Membership.objects.count()
         self.assertEqual(beforeCount, afterCount + 2)
+
+    def test_user_cannot_have_two_memberships_of_a_club(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Membership.objects.create(user = self.other_user, club = self.club, is_applicant = True)
+
+    def test_club_cannot_have_two_owners(self):
+        self.other_member.is_owner = True
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.other_member.save()
+
+    def test_apply_club_twice_keeps_one_membership(self):
+        beforeCount = Membership.objects.count()
+        self.other_user.apply_club(self.club)
+        afterCount = Membership.objects.count()
+        self.assertEqual(beforeCount, afterCount)
+
+    def test_role_flags_follow_role_rank(self):
+        self.assertEqual(self.owner.role, Membership.Role.OWNER)
+        self.assertTrue(self.owner.is_member and self.owner.is_officer and self.owner.is_owner)
+        self.assertEqual(self.other_member.role, Membership.Role.MEMBER)
+        self.assertTrue(self.other_member.is_applicant)
+        self.assertFalse(self.other_member.is_officer)
+
+    def test_clearing_a_role_flag_lowers_role_below_it(self):
+        self.owner.is_officer = False
+        self.assertEqual(self.owner.role, Membership.Role.MEMBER)
+        self.other_member.is_member = False
+        self.assertEqual(self.other_member.role, Membership.Role.APPLICANT)
+
+    def test_officers_and_above_is_a_range_query(self):
+        self.owner.promote_member(self.other_member)
+        officers = Membership.objects.filter(club = self.club, role__gte = Membership.Role.OFFICER)
+        self.assertEqual(officers.count(), 2)
@@ -1,4 +1,5 @@
 """Unit tests for the User model."""
+from hashlib import md5
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 from clubs.models import User, Club, Membership
@@ -15,6 +16,26 @@ class UserModelTestCase(TestCase):
     def test_valid_user(self):
         self._assert_user_is_valid()
 
+    def test_gravatar(self):
+        email_hash = md5(b'janedoe@example.org').hexdigest()
+        self.assertEqual(self.user.gravatar(), f'https://www.gravatar.com/avatar/{email_hash}?size=120&default=mp')
+        self.assertEqual(self.user.mini_gravatar(), f'https://www.gravatar.com/avatar/{email_hash}?size=60&default=mp')
+
+    def test_avatar(self):
+        email_hash = md5(b'janedoe@example.org').hexdigest()
+        self.assertEqual(self.user.avatar(), f'/avatar/{email_hash}/120/')
+        self.assertEqual(self.user.mini_avatar(), f'/avatar/{email_hash}/60/')
+
+    def test_save_stores_email_hash(self):
+        self.user.username = ' JaneDoe3@Example.org'
+        self.user.save()
+        self.assertEqual(User.objects.get(pk = self.user.pk).email_hash, md5(b'janedoe3@example.org').hexdigest())
+
+    def test_save_with_update_fields_stores_email_hash(self):
+        self.user.username = 'janedoe3@example.org'
+        self.user.save(update_fields=['username'])
+        self.assertEqual(User.objects.get(pk = self.user.pk).email_hash, md5(b'janedoe3@example.org').hexdigest())
+
     def test_xp_cannot_be_less_than_zero(self):
         self.user.chess_xp = -1
         self._assert_user_is_invalid()
@@ -0,0 +1,138 @@
+"""Tests of the read-only JSON API."""
+import json
+from django.test import TestCase
+from django.urls import reverse
+from clubs.models import User, Club, Membership
+
+class ApiTestCase(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/users.json', 'clubs/tests/fixtures/clubs.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.other_user = User.objects.get(username = 'janedoe1@example.org')
+        self.club = Club.objects.get(name = 'TheGrand')
+        self.club2 = Club.objects.get(name = 'ClubB')
+        self.user.make_club_owner(self.club)
+        self.other_user.apply_club(self.club2)
+        self.client.login(username = self.user.username, password = 'Password123')
+
+    def _get_json(self, url, **params):
+        response = self.client.get(url, params)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, json.loads(content)
+
+    def test_api_urls(self):
+        self.assertEqual(reverse('api_clubs'), '/api/v1/clubs/')
+        self.assertEqual(reverse('api_club_detail', args=[self.club.name]), '/api/v1/clubs/TheGrand/')
+        self.assertEqual(reverse('api_club_members', args=[self.club.name]), '/api/v1/clubs/TheGrand/members/')
+        self.assertEqual(reverse('api_my_memberships'), '/api/v1/me/memberships/')
+
+    def test_api_requires_log_in(self):
+        self.client.logout()
+        response, data = self._get_json(reverse('api_clubs'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('error', data)
+
+    def test_api_is_read_only(self):
+        response = self.client.post(reverse('api_clubs'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_get_clubs(self):
+        response, data = self._get_json(reverse('api_clubs'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual([club['name'] for club in data['results']], ['ClubB', 'TheGrand'])
+        self.assertEqual(data['results'][1]['owner_first_name'], self.user.first_name)
+        self.assertEqual(data['results'][1]['owner_last_name'], self.user.last_name)
+        self.assertEqual(data['results'][1]['member_count'], 1)
+        self.assertIsNone(data['results'][0]['owner_first_name'])
+        self.assertNotIn(self.user.username, json.dumps(data))
+        self.assertIsNone(data['next'])
+
+    def test_get_clubs_with_selected_fields(self):
+        response, data = self._get_json(reverse('api_clubs'), fields = 'name,location', sort = 'size')
+        self.assertEqual(data['results'], [{'name': 'TheGrand', 'location': 'London'}, {'name': 'ClubB', 'location': 'London'}])
+
+    def test_get_clubs_with_unknown_field(self):
+        response, data = self._get_json(reverse('api_clubs'), fields = 'name,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', data['error'])
+
+    def test_get_clubs_with_unknown_sort(self):
+        response, data = self._get_json(reverse('api_clubs'), sort = 'name')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_clubs_pages_with_cursor(self):
+        for club_id in range(5):
+            Club.objects.create(name = f'Club{club_id}', location = 'London')
+        names = []
+        response, data = self._get_json(reverse('api_clubs'), page_size = 3, fields = 'name')
+        names += [club['name'] for club in data['results']]
+        while data['next']:
+            response, data = self._get_json(reverse('api_clubs'), page_size = 3, fields = 'name', after = data['next'])
+            names += [club['name'] for club in data['results']]
+        self.assertEqual(names, ['ClubB', 'TheGrand'] + [f'Club{club_id}' for club_id in range(5)])
+
+    def test_get_clubs_streams_rows_in_chunks(self):
+        Club.objects.bulk_create([Club(name = f'Club{club_id}', location = 'London') for club_id in range(450)])
+        response = self.client.get(reverse('api_clubs'), {'page_size': 1000, 'fields': 'id'})
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 3)
+        self.assertEqual(len(json.loads(b''.join(chunks))['results']), 452)
+
+    def test_get_clubs_with_invalid_cursor(self):
+        response, data = self._get_json(reverse('api_clubs'), after = 'not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_clubs_with_cursor_of_another_sort(self):
+        response, data = self._get_json(reverse('api_clubs'), page_size = 1)
+        response, data = self._get_json(reverse('api_clubs'), sort = 'size', after = data['next'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'error': 'Invalid cursor.'})
+
+    def test_get_club_detail(self):
+        response, data = self._get_json(reverse('api_club_detail', args=[self.club.name]), fields = 'name,owner_last_name')
+        self.assertEqual(data, {'name': 'TheGrand', 'owner_last_name': self.user.last_name})
+
+    def test_get_missing_club_detail(self):
+        response, data = self._get_json(reverse('api_club_detail', args=['Nowhere']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_club_members(self):
+        Membership.objects.create(user = self.other_user, club = self.club, is_member = True)
+        response, data = self._get_json(reverse('api_club_members', args=[self.club.name]), fields = 'username,role', sort = 'chess_xp')
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(data['results'], [
+            {'username': self.user.username, 'role': 'owner'},
+            {'username': self.other_user.username, 'role': 'member'},
+        ])
+
+    def test_get_club_members_as_plain_member_hides_officer_fields(self):
+        Membership.objects.create(user = self.other_user, club = self.club, is_member = True)
+        self.client.login(username = self.other_user.username, password = 'Password123')
+        response, data = self._get_json(reverse('api_club_members', args=[self.club.name]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({field for row in data['results'] for field in row}, {'id', 'role', 'first_name', 'last_name', 'bio'})
+        self.assertNotIn(self.user.username, json.dumps(data))
+        response, data = self._get_json(reverse('api_club_members', args=[self.club.name]), fields = 'username')
+        self.assertEqual(response.status_code, 400)
+        response, data = self._get_json(reverse('api_club_members', args=[self.club.name]), sort = 'chess_xp')
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_club_members_excludes_applicants(self):
+        self.other_user.apply_club(self.club)
+        response, data = self._get_json(reverse('api_club_members', args=[self.club.name]), fields = 'username')
+        self.assertEqual(data['results'], [{'username': self.user.username}])
+
+    def test_get_club_members_as_non_member(self):
+        response, data = self._get_json(reverse('api_club_members', args=[self.club2.name]))
+        self.assertEqual(response.status_code, 403)
+        response, data = self._get_json(reverse('api_club_members', args=['Nowhere']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_my_memberships(self):
+        self.user.apply_club(self.club2)
+        response, data = self._get_json(reverse('api_my_memberships'), fields = 'club,role')
+        self.assertEqual(data['results'], [{'club': 'ClubB', 'role': 'applicant'}, {'club': 'TheGrand', 'role': 'owner'}])
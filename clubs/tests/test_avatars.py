@@ -0,0 +1,85 @@
+"""Unit tests for the avatar proxy cache."""
+import os
+import tempfile
+import time
+from django.test import SimpleTestCase, override_settings
+from clubs import avatars
+from clubs.tests.helpers import AvatarStubServer
+
+EMAIL_HASH = 'a' * 32
+
+def unavailable_fetcher(email_hash, size):
+    raise avatars.AvatarUnavailable('offline')
+
+class AvatarCacheTestCase(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.upstream = AvatarStubServer()
+        cls.upstream.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.upstream.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(AVATAR_CACHE_DIR = self.cache_dir.name, AVATAR_UPSTREAM_URL = self.upstream.upstream_url)
+        self.settings.enable()
+        self.upstream.requests.clear()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.cache_dir.cleanup()
+
+    def _age_avatar(self, email_hash, size, seconds):
+        ref_path = avatars.get_cache().ref_path(email_hash, size)
+        past = time.time() - seconds
+        os.utime(ref_path, (past, past))
+
+    def test_miss_fetches_from_upstream_once(self):
+        avatar = avatars.get_avatar(EMAIL_HASH, 60)
+        self.assertEqual(avatar.content, AvatarStubServer.image)
+        self.assertEqual(avatar.content_type, 'image/png')
+        self.assertFalse(avatar.placeholder)
+        self.assertEqual(avatars.get_avatar(EMAIL_HASH, 60), avatar)
+        self.assertEqual(self.upstream.requests, [f'/avatar/{EMAIL_HASH}?size=60'])
+
+    def test_identical_images_share_one_blob(self):
+        first = avatars.get_avatar(EMAIL_HASH, 60)
+        second = avatars.get_avatar('b' * 32, 60)
+        self.assertEqual(first.etag, second.etag)
+        blobs = [name for _, _, names in os.walk(os.path.join(self.cache_dir.name, 'blobs')) for name in names]
+        self.assertEqual(len(blobs), 1)
+
+    def test_stale_avatar_is_served_and_revalidated_in_background(self):
+        avatars.get_avatar(EMAIL_HASH, 60)
+        self._age_avatar(EMAIL_HASH, 60, 2 * 60 * 60 * 24)
+        avatar = avatars.get_avatar(EMAIL_HASH, 60)
+        self.assertEqual(avatar.content, AvatarStubServer.image)
+        avatars.schedule_refresh(EMAIL_HASH, 60).result(timeout=5)
+        self.assertEqual(len(self.upstream.requests), 2)
+        self.assertLess(avatars.get_cache().read(EMAIL_HASH, 60)[1], 60)
+
+    def test_missing_upstream_image_falls_back_to_placeholder(self):
+        avatar = avatars.get_avatar(AvatarStubServer.missing_hash, 60)
+        self.assertTrue(avatar.placeholder)
+        self.assertEqual(avatar.content_type, 'image/svg+xml')
+        self.assertIn(b'<svg', avatar.content)
+
+    def test_failed_refresh_keeps_fetched_image(self):
+        avatars.get_avatar(EMAIL_HASH, 60)
+        with override_settings(AVATAR_FETCHER = 'clubs.tests.test_avatars.unavailable_fetcher'):
+            avatar = avatars.refresh_avatar(EMAIL_HASH, 60)
+        self.assertFalse(avatar.placeholder)
+        self.assertEqual(avatar.content, AvatarStubServer.image)
+
+    def test_valid_avatar(self):
+        self.assertTrue(avatars.valid_avatar(EMAIL_HASH, 60))
+        self.assertFalse(avatars.valid_avatar('not-a-hash', 60))
+        self.assertTrue(avatars.valid_avatar(EMAIL_HASH, 120))
+        self.assertFalse(avatars.valid_avatar(EMAIL_HASH, 0))
+        self.assertFalse(avatars.valid_avatar(EMAIL_HASH, 77))
+        self.assertFalse(avatars.valid_avatar(EMAIL_HASH, 100000))
@@ -0,0 +1,41 @@
+"""Unit tests for the check_club_owners management command."""
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from clubs.models import User, Club, Membership
+
+class CheckClubOwnersCommandTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/users.json', 'clubs/tests/fixtures/clubs.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.other_user = User.objects.get(username = 'janedoe1@example.org')
+        self.club = Club.objects.get(name = 'TheGrand')
+        self.owner = Membership.objects.create(user = self.user, club = self.club, is_member = True, is_officer = True, is_owner = True)
+        self.officer = Membership.objects.create(user = self.other_user, club = self.club, is_member = True, is_officer = True)
+
+    def test_owner_follows_owner_membership(self):
+        self.assertEqual(Club.objects.get(pk = self.club.pk).owner, self.user)
+        self.owner.transfer_ownership(self.officer)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).owner, self.other_user)
+        self.officer.delete()
+        self.assertIsNone(Club.objects.get(pk = self.club.pk).owner)
+
+    def test_consistent_owners(self):
+        out = StringIO()
+        call_command('check_club_owners', stdout = out)
+        self.assertIn('0 clubs have an inconsistent owner.', out.getvalue())
+
+    def test_fix_inconsistent_owners(self):
+        Club.objects.update(owner = self.other_user)
+        out = StringIO()
+        call_command('check_club_owners', stdout = out)
+        self.assertIn('2 clubs have an inconsistent owner.', out.getvalue())
+        self.assertEqual(Club.objects.get(pk = self.club.pk).owner, self.other_user)
+        version = Club.objects.get(pk = self.club.pk).version
+        call_command('check_club_owners', '--fix', stdout = out)
+        self.assertIn('Fixed the owner of 2 clubs.', out.getvalue())
+        self.assertEqual(Club.objects.get(pk = self.club.pk).owner, self.user)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).version, version + 1)
+        self.assertIsNone(Club.objects.get(name = 'ClubB').owner)
@@ -0,0 +1,89 @@
+"""Unit tests for the clubs context processors."""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import AnonymousUser
+from clubs.context_processors import joined_clubs
+from clubs.models import User, Club, Membership
+
+class JoinedClubsContextProcessorTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/users.json', 'clubs/tests/fixtures/clubs.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.club = Club.objects.get(name = 'TheGrand')
+        self.other_club = Club.objects.get(name = 'ClubB')
+        Membership.objects.create(user = self.user, club = self.club, is_applicant = True, is_member = True)
+        Membership.objects.create(user = self.user, club = self.other_club, is_applicant = True)
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+        cache.clear()
+
+    def test_joined_clubs_only_contains_member_clubs(self):
+        clubs = joined_clubs(self.request)['joined_clubs']
+        self.assertEqual(list(clubs), [self.club])
+
+    def test_joined_clubs_is_lazy(self):
+        with self.assertNumQueries(0):
+            joined_clubs(self.request)
+
+    def test_joined_clubs_is_memoized_per_request(self):
+        with self.assertNumQueries(1):
+            list(joined_clubs(self.request)['joined_clubs'])
+            list(joined_clubs(self.request)['joined_clubs'])
+
+    def test_joined_clubs_for_anonymous_user(self):
+        self.request.user = AnonymousUser()
+        self.assertEqual(joined_clubs(self.request)['joined_clubs'], [])
+
+    @override_settings(JOINED_CLUBS_CACHE_TIMEOUT=60)
+    def test_joined_clubs_cache_is_invalidated_on_membership_change(self):
+        list(joined_clubs(self.request)['joined_clubs'])
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(0):
+            list(joined_clubs(request)['joined_clubs'])
+        Membership.objects.filter(club = self.other_club).get().delete()
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(1):
+            self.assertEqual(list(joined_clubs(request)['joined_clubs']), [self.club])
+
+    @override_settings(JOINED_CLUBS_CACHE_TIMEOUT=60)
+    def test_joined_clubs_cache_holds_only_names(self):
+        list(joined_clubs(self.request)['joined_clubs'])
+        request = RequestFactory().get('/')
+        request.user = self.user
+        Club.add_members(self.club.id, 4)
+        with self.assertNumQueries(0):
+            club, = joined_clubs(request)['joined_clubs']
+            self.assertEqual(club.name, 'TheGrand')
+        self.assertEqual(club.get_deferred_fields(), {field.attname for field in Club._meta.concrete_fields} - {'id', 'name'})
+        self.assertEqual(club.member_count, 5)
+
+    @override_settings(JOINED_CLUBS_CACHE_TIMEOUT=60)
+    def test_joined_clubs_cache_is_invalidated_on_club_rename(self):
+        list(joined_clubs(self.request)['joined_clubs'])
+        club = Club.objects.get(pk = self.club.pk)
+        club.description = 'A new description'
+        club.save()
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(0):
+            list(joined_clubs(request)['joined_clubs'])
+        club.name = 'TheGrander'
+        club.save()
+        request = RequestFactory().get('/')
+        request.user = self.user
+        self.assertEqual([club.name for club in joined_clubs(request)['joined_clubs']], ['TheGrander'])
+
+    def test_club_and_profile_saves_do_not_read_members_without_the_cache(self):
+        club = Club.objects.get(pk = self.club.pk)
+        club.name = 'TheGrander'
+        with self.assertNumQueries(2):
+            club.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save()
+        self.assertFalse([query['sql'] for query in queries if query['sql'].startswith('SELECT')])
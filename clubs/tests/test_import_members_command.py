@@ -0,0 +1,95 @@
+"""Unit tests for the import_members management command and roster importer."""
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from clubs.models import User, Club, Membership
+from clubs.roster_import import import_roster
+
+HEADER = 'first_name,last_name,email,password,bio,statement,chess_xp,role\n'
+
+class ImportMembersCommandTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/users.json', 'clubs/tests/fixtures/clubs.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.club = Club.objects.get(name = 'TheGrand')
+        self.user.make_club_owner(self.club)
+
+    def _write_csv(self, content):
+        descriptor, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(descriptor, 'w') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def _import(self, content, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_members', self.club.name, self._write_csv(content), stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_creates_users_and_memberships(self):
+        out, err = self._import(HEADER
+            + 'Ann,Smith,ann@example.org,Password123,Bio,Statement,5,member\n'
+            + 'Bob,Jones,bob@example.org,,,Statement,,applicant\n'
+            + 'Cat,Brown,cat@example.org,,,Statement,3,officer\n')
+        self.assertIn('Created 3 users and 3 memberships, rejected 0 rows.', out)
+        ann = User.objects.get(username = 'ann@example.org')
+        self.assertTrue(ann.check_password('Password123'))
+        self.assertEqual(ann.email_hash, User.objects.get(pk = ann.pk).email_hash)
+        self.assertTrue(ann.email_hash)
+        self.assertFalse(User.objects.get(username = 'bob@example.org').has_usable_password())
+        self.assertEqual(User.objects.get(username = 'bob@example.org').chess_xp, 0)
+        roles = dict(Membership.objects.filter(club = self.club).values_list('user__username', 'role'))
+        self.assertEqual(roles['ann@example.org'], Membership.Role.MEMBER)
+        self.assertEqual(roles['bob@example.org'], Membership.Role.APPLICANT)
+        self.assertEqual(roles['cat@example.org'], Membership.Role.OFFICER)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 3)
+
+    def test_import_reports_invalid_rows(self):
+        out, err = self._import(HEADER
+            + 'Ann,Smith,not-an-email,,,Statement,1,member\n'
+            + 'Bob,Jones,bob@example.org,weak,,Statement,1,member\n'
+            + 'Cat,Brown,cat@example.org,,,,1,member\n'
+            + 'Dan,Green,dan@example.org,,,Statement,1,owner\n'
+            + 'Eve,White,eve@example.org,,,Statement,1,member\n'
+            + 'Eve,White,eve@example.org,,,Statement,1,member\n')
+        self.assertIn('Created 1 users and 1 memberships, rejected 5 rows.', out)
+        self.assertIn('Line 2: username:', err)
+        self.assertIn('Line 3: new_password:', err)
+        self.assertIn('Line 4: statement:', err)
+        self.assertIn('Line 5: role:', err)
+        self.assertIn('Line 7: username: eve@example.org appears earlier in the file.', err)
+
+    def test_import_adds_existing_users_as_applicants_only(self):
+        other_user = User.objects.get(username = 'janedoe1@example.org')
+        out, err = self._import(HEADER
+            + f'Jane,Doe,{other_user.username},,,Statement,1,officer\n'
+            + f'Jane,Doe,{self.user.username},,,Statement,1,member\n')
+        self.assertIn('Created 0 users and 1 memberships, rejected 1 rows.', out)
+        self.assertIn(f'Line 2: {other_user.username} already has an account and was added as an applicant only.', out)
+        self.assertIn(f'{self.user.username} already belongs to TheGrand', err)
+        self.assertTrue(Membership.objects.get(club = self.club, user = other_user).is_applicant)
+        self.assertFalse(Membership.objects.get(club = self.club, user = other_user).is_member)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 1)
+
+    def test_import_accepts_export_headings(self):
+        out, err = self._import('First name,Last name,Email,Role,Chess XP,Bio,Statement\n'
+            + 'Ann,Smith,ann@example.org,Officer,5,Bio,Statement\n')
+        self.assertIn('Created 1 users and 1 memberships', out)
+        self.assertTrue(Membership.objects.get(user__username = 'ann@example.org').is_officer)
+
+    def test_import_writes_in_batches(self):
+        rows = [(line, {'first_name': 'First', 'last_name': 'Last', 'email': f'user{line}@example.org', 'statement': 'Hi'}) for line in range(2, 9)]
+        # Per batch: savepoint, existing users, insert users, new user ids, insert memberships, member_count, release
+        with self.assertNumQueries(3 * 7):
+            result = import_roster(self.club, rows, batch_size=3)
+        self.assertEqual(result.users_created, 7)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 8)
+
+    def test_import_into_missing_club(self):
+        with self.assertRaises(CommandError):
+            call_command('import_members', 'Nowhere', self._write_csv(HEADER), stdout=StringIO())
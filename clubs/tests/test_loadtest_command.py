@@ -0,0 +1,107 @@
+"""Unit tests for the loadtest management command."""
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import LiveServerTestCase, SimpleTestCase, TransactionTestCase
+from clubs.demo import DEMO_PASSWORD
+from clubs.loadtest import LoadTestError, parse_mix, percentile, summarise
+from clubs.models import User, Club, Membership
+
+class LoadTestHelpersTest(SimpleTestCase):
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('club_list=4, club_profile=1.5,view_members'),
+            {'club_list': 4.0, 'club_profile': 1.5, 'view_members': 1.0})
+
+    def test_parse_mix_rejects_bad_weights(self):
+        with self.assertRaises(LoadTestError):
+            parse_mix('club_list=often')
+        with self.assertRaises(LoadTestError):
+            parse_mix('club_list=0')
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summarise(self):
+        summary = summarise([0.004, 0.001, 0.002, 0.003], {200: 3, 404: 1}, 2.0)
+        self.assertEqual(summary['requests'], 4)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['statuses'], {'200': 3, '404': 1})
+        self.assertEqual(summary['throughput'], 2.0)
+        self.assertEqual(summary['p50_ms'], 2.0)
+        self.assertEqual(summary['p99_ms'], 4.0)
+        self.assertEqual(summary['max_ms'], 4.0)
+
+class LoadTestSetupMixin:
+
+    fixtures = ['clubs/tests/fixtures/users.json', 'clubs/tests/fixtures/clubs.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.club = Club.objects.get(name = 'TheGrand')
+        self.user.make_club_owner(self.club)
+        Membership.objects.create(user = User.objects.get(username = 'janedoe1@example.org'), club = self.club, role = Membership.Role.APPLICANT)
+        descriptor, self.output = tempfile.mkstemp(suffix='.json')
+        os.close(descriptor)
+        self.addCleanup(os.remove, self.output)
+
+    def _loadtest(self, **options):
+        out = StringIO()
+        call_command('loadtest', stdout=out, password=DEMO_PASSWORD, output=self.output, **options)
+        with open(self.output) as file:
+            return out.getvalue(), json.load(file)
+
+class LoadTestCommandTest(LoadTestSetupMixin, TransactionTestCase):
+
+    def test_loadtest_in_process(self):
+        out, results = self._loadtest(threads=2, requests=20)
+        self.assertEqual(results['target'], 'in-process')
+        self.assertEqual(results['threads'], 2)
+        self.assertEqual(results['overall']['requests'], 20)
+        self.assertEqual(results['overall']['errors'], 0)
+        self.assertEqual(sum(view['requests'] for view in results['views'].values()), 20)
+        self.assertEqual(set(results['views']), {'club_list', 'club_profile', 'view_members', 'application_list'})
+        for summary in [results['overall'], *[view for view in results['views'].values() if view['requests']]]:
+            self.assertLessEqual(summary['p50_ms'], summary['p95_ms'])
+            self.assertLessEqual(summary['p95_ms'], summary['p99_ms'])
+            self.assertLessEqual(summary['p99_ms'], summary['max_ms'])
+        self.assertIn('p99 ms', out)
+        self.assertIn(f'Wrote the results to {self.output}.', out)
+
+    def test_loadtest_fills_in_url_arguments(self):
+        out, results = self._loadtest(threads=1, requests=10, mix='member_profile,export_members')
+        self.assertEqual(results['overall']['statuses'], {'200': 10})
+
+    def test_loadtest_stops_after_duration(self):
+        out, results = self._loadtest(threads=2, requests=10 ** 9, duration=0.5, mix='club_list')
+        self.assertGreater(results['overall']['requests'], 0)
+        self.assertLess(results['elapsed'], 5)
+
+    def test_loadtest_rejects_unknown_url_name(self):
+        with self.assertRaises(CommandError):
+            self._loadtest(mix='no_such_view')
+
+    def test_loadtest_needs_an_officer(self):
+        Membership.objects.all().delete()
+        with self.assertRaises(CommandError):
+            self._loadtest()
+
+    def test_loadtest_rejects_wrong_password(self):
+        with self.assertRaises(CommandError):
+            call_command('loadtest', stdout=StringIO(), password='WrongPassword123')
+
+class LoadTestHttpTest(LoadTestSetupMixin, LiveServerTestCase):
+
+    def test_loadtest_over_http(self):
+        out, results = self._loadtest(threads=2, requests=12, base_url=self.live_server_url + '/', mix='club_list,member_profile,view_members')
+        self.assertEqual(results['target'], self.live_server_url + '/')
+        self.assertEqual(results['overall']['requests'], 12)
+        self.assertEqual(results['overall']['statuses'], {'200': 12})
@@ -0,0 +1,84 @@
+"""Unit tests for keyset pagination."""
+from django.test import TestCase
+from clubs.models import Club, Membership
+from clubs.pagination import InvalidCursor, KeysetPaginator, clamp_page_size, decode_cursor, encode_cursor
+
+class KeysetPaginatorTest(TestCase):
+
+    def setUp(self):
+        for club_id in range(7):
+            Club.objects.create(name=f'Club{club_id}', description='The best', location='London')
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(['2021-12-04T13:12:12Z', 10])
+        self.assertEqual(decode_cursor(cursor, 2), ['2021-12-04T13:12:12Z', 10])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-cursor', 2)
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor([1]), 2)
+
+    def test_pages_cover_every_row_once(self):
+        paginator = KeysetPaginator(Club.objects.all(), ('created_at', 'id'), 3)
+        names = []
+        page = paginator.page()
+        names += [club.name for club in page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            names += [club.name for club in page]
+        self.assertEqual(names, [f'Club{club_id}' for club_id in range(7)])
+
+    def test_descending_keys(self):
+        paginator = KeysetPaginator(Club.objects.values('id', 'name'), ('-name', 'id'), 4)
+        first_page = paginator.page()
+        second_page = paginator.page(first_page.next_cursor)
+        self.assertEqual([club['name'] for club in first_page], ['Club6', 'Club5', 'Club4', 'Club3'])
+        self.assertEqual([club['name'] for club in second_page], ['Club2', 'Club1', 'Club0'])
+        self.assertFalse(second_page.has_next())
+
+    def test_stream_matches_pages(self):
+        paginator = KeysetPaginator(Club.objects.values('id', 'name', 'created_at'), ('created_at', 'id'), 3)
+        page = paginator.page()
+        stream = paginator.stream(chunk_size=2)
+        self.assertIsNone(stream.next_cursor)
+        self.assertEqual(list(stream), page.object_list)
+        self.assertEqual(stream.next_cursor, page.next_cursor)
+        last_stream = paginator.stream(paginator.page(page.next_cursor).next_cursor)
+        self.assertEqual([club['name'] for club in last_stream], ['Club6'])
+        self.assertIsNone(last_stream.next_cursor)
+
+    def test_stream_rejects_invalid_cursor_immediately(self):
+        paginator = KeysetPaginator(Club.objects.all(), ('created_at', 'id'), 3)
+        with self.assertRaises(InvalidCursor):
+            paginator.stream('not-a-cursor')
+
+    def test_cursor_values_must_fit_the_keys(self):
+        created_cursor = KeysetPaginator(Club.objects.all(), ('created_at', 'id'), 3).page().next_cursor
+        size_paginator = KeysetPaginator(Club.objects.all(), ('-member_count', 'id'), 3)
+        for cursor in [created_cursor, encode_cursor([None, 1]), encode_cursor([[1], 1])]:
+            with self.subTest(cursor = cursor), self.assertRaises(InvalidCursor):
+                size_paginator.page(cursor)
+        for values in [['notadate', 1], [3, 1], ['2021-12-04T13:12:12Z', 'x']]:
+            with self.subTest(values = values), self.assertRaises(InvalidCursor):
+                KeysetPaginator(Club.objects.all(), ('created_at', 'id'), 3).page(encode_cursor(values))
+
+    def test_cursor_values_of_related_keys_are_checked(self):
+        paginator = KeysetPaginator(Membership.objects.all(), ('-user__chess_xp', 'id'), 3)
+        with self.assertRaises(InvalidCursor):
+            paginator.page(encode_cursor(['x', 1]))
+        self.assertEqual(list(paginator.page(encode_cursor(['5', 1]))), [])
+
+    def test_page_query_does_not_use_offset(self):
+        paginator = KeysetPaginator(Club.objects.all(), ('created_at', 'id'), 3)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1) as queries:
+            paginator.page(cursor)
+        self.assertNotIn('OFFSET', queries.captured_queries[0]['sql'])
+
+    def test_clamp_page_size(self):
+        self.assertEqual(clamp_page_size(None, 20, 100), 20)
+        self.assertEqual(clamp_page_size('abc', 20, 100), 20)
+        self.assertEqual(clamp_page_size('0', 20, 100), 1)
+        self.assertEqual(clamp_page_size('500', 20, 100), 100)
+        self.assertEqual(clamp_page_size('30', 20, 100), 30)
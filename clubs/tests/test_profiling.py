@@ -0,0 +1,89 @@
+"""Unit tests for the staff request profiler."""
+import os
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from clubs.models import User, Club
+from clubs.profiling import prune_profiles
+
+class ProfilingMiddlewareTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/users.json', 'clubs/tests/fixtures/clubs.json']
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        settings_override = override_settings(PROFILE_DIR = self.profile_dir, PROFILE_RETENTION = 3, PROFILE_TOP_ENTRIES = 10)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.user.is_staff = True
+        self.user.save()
+        self.club = Club.objects.get(name = 'TheGrand')
+        self.user.make_club_owner(self.club)
+        self.url = reverse('club_profile', kwargs = {'club_name': self.club.name})
+
+    def _profiles(self):
+        return sorted(os.listdir(self.profile_dir))
+
+    def test_staff_request_is_profiled(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        response = self.client.get(self.url, {'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        report = response.content.decode()
+        self.assertIn(f'Profiled GET {self.url}?profile=1 for {self.user.username}: status 200', report)
+        self.assertIn('Ordered by: cumulative time', report)
+        self.assertIn('club_profile', report)
+        self.assertEqual(self._profiles(), [response['X-Profile-File']])
+        self.assertIn('-club_profile-', response['X-Profile-File'])
+
+    def test_profile_header_switches_profiling_on(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        response = self.client.get(self.url, HTTP_X_PROFILE = '1')
+        self.assertIn('Ordered by: cumulative time', response.content.decode())
+        self.assertEqual(len(self._profiles()), 1)
+
+    def test_streamed_content_is_profiled(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        url = reverse('export_members', kwargs = {'club_name': self.club.name})
+        size = len(b''.join(self.client.get(url).streaming_content))
+        with self.settings(PROFILE_TOP_ENTRIES = 1000):
+            response = self.client.get(url, {'profile': '1'})
+        self.assertIn(f'status 200, {size} bytes', response.content.decode())
+        self.assertIn('(csv_chunks)', response.content.decode())
+
+    def test_request_without_switch_is_not_profiled(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'club_profile.html')
+        self.assertEqual(self._profiles(), [])
+
+    def test_non_staff_request_is_not_profiled(self):
+        self.user.is_staff = False
+        self.user.save()
+        self.client.login(username = self.user.username, password = 'Password123')
+        response = self.client.get(self.url, {'profile': '1'})
+        self.assertTemplateUsed(response, 'club_profile.html')
+        self.assertFalse(response.has_header('X-Profile-File'))
+        self.assertEqual(self._profiles(), [])
+
+    def test_anonymous_request_is_not_profiled(self):
+        response = self.client.get(self.url, {'profile': '1'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self._profiles(), [])
+
+    def test_old_profiles_are_pruned(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        names = [self.client.get(self.url, {'profile': '1'})['X-Profile-File'] for _ in range(5)]
+        self.assertEqual(self._profiles(), sorted(names[-3:]))
+
+    def test_prune_profiles_keeps_newest(self):
+        for index in range(4):
+            path = os.path.join(self.profile_dir, f'{index}.prof')
+            open(path, 'w').close()
+            os.utime(path, (index, index))
+        open(os.path.join(self.profile_dir, 'notes.txt'), 'w').close()
+        prune_profiles(self.profile_dir, 2)
+        self.assertEqual(self._profiles(), ['2.prof', '3.prof', 'notes.txt'])
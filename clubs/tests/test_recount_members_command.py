@@ -0,0 +1,36 @@
+"""Unit tests for the recount_members management command."""
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from clubs.models import User, Club, Membership
+
+class RecountMembersCommandTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/users.json', 'clubs/tests/fixtures/clubs.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.other_user = User.objects.get(username = 'janedoe1@example.org')
+        self.club = Club.objects.get(name = 'TheGrand')
+        self.owner = Membership.objects.create(user = self.user, club = self.club, is_member = True, is_officer = True, is_owner = True)
+        self.applicant = Membership.objects.create(user = self.other_user, club = self.club, is_applicant = True)
+
+    def test_member_count_follows_membership_changes(self):
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 1)
+        self.owner.approve_application(self.applicant)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 2)
+        self.other_user.delete()
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 1)
+
+    def test_saving_a_stale_club_keeps_member_count(self):
+        self.club.description = 'Changed'
+        self.club.save()
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 1)
+
+    def test_recount_repairs_drift(self):
+        Club.objects.update(member_count = 42)
+        out = StringIO()
+        call_command('recount_members', stdout = out)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 1)
+        self.assertEqual(Club.objects.get(name = 'ClubB').member_count, 0)
+        self.assertIn('2 had drifted', out.getvalue())
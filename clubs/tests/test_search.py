@@ -0,0 +1,55 @@
+"""Unit tests for the club search index."""
+from django.db import connection
+from django.test import TestCase
+from clubs.models import Club
+from clubs.search import install_search_index, match_expression, search_clubs, search_terms
+
+class ClubSearchTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/clubs.json']
+
+    def setUp(self):
+        self.club = Club.objects.create(name='Kerbal Chess', description='Blitz every Friday', location='Bristol')
+        self.other_club = Club.objects.create(name='Bristol Knights', description='Classical games', location='Bath')
+
+    def test_search_terms_strip_query_syntax(self):
+        self.assertEqual(search_terms('Kerbal "OR" club*'), ['Kerbal', 'OR', 'club'])
+        self.assertEqual(match_expression(['Kerbal', 'OR']), '"Kerbal"* "OR"*')
+
+    def test_search_matches_every_column(self):
+        self.assertEqual(list(search_clubs('kerbal')), [self.club])
+        self.assertEqual(list(search_clubs('blitz')), [self.club])
+        self.assertCountEqual([club.name for club in search_clubs('London')], ['ClubB', 'TheGrand'])
+
+    def test_search_matches_prefixes_of_every_term(self):
+        self.assertEqual(list(search_clubs('kerb fri')), [self.club])
+        self.assertEqual(list(search_clubs('kerbal classical')), [])
+
+    def test_search_ranks_name_matches_first(self):
+        self.assertEqual(list(search_clubs('bristol')), [self.other_club, self.club])
+
+    def test_search_with_empty_query(self):
+        self.assertEqual(list(search_clubs(' "* ')), [])
+
+    def test_search_is_paginated(self):
+        first_page = search_clubs('bristol', page_size=1)
+        self.assertEqual(list(first_page), [self.other_club])
+        second_page = search_clubs('bristol', first_page.next_cursor, page_size=1)
+        self.assertEqual(list(second_page), [self.club])
+        self.assertFalse(second_page.has_next())
+
+    def test_index_follows_updates_and_deletes(self):
+        self.club.description = 'Rapid on Sundays'
+        self.club.save()
+        self.assertEqual(list(search_clubs('blitz')), [])
+        self.assertEqual(list(search_clubs('rapid')), [self.club])
+        self.club.delete()
+        self.assertEqual(list(search_clubs('rapid')), [])
+
+    def test_install_search_index_restores_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER clubs_club_fts_insert')
+        self.assertTrue(install_search_index())
+        self.assertFalse(install_search_index())
+        club = Club.objects.create(name='Dragonfly', description='', location='London')
+        self.assertEqual(list(search_clubs('dragonfly')), [club])
@@ -0,0 +1,129 @@
+"""Unit tests for the seed management command."""
+from io import StringIO
+from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Q
+from django.test import TestCase
+from clubs.demo import DEMO_PASSWORD, SEED_EMAIL_DOMAIN
+from clubs.management.commands.seed import DEMO_CLUBS, DEMO_USERS
+from clubs.models import User, Club, Membership, email_hash
+from clubs.search import search_clubs
+
+class SeedCommandTest(TestCase):
+
+    def _seed(self, **options):
+        out = StringIO()
+        options.setdefault('workers', 1)
+        call_command('seed', stdout=out, **options)
+        return out.getvalue()
+
+    def _unseed(self):
+        Membership.objects.all().delete()
+        Club.objects.all().delete()
+        User.objects.all().delete()
+
+    def _snapshot(self):
+        users = list(User.objects.order_by('id').values_list('username', 'first_name', 'last_name', 'bio', 'chess_xp'))
+        clubs = list(Club.objects.order_by('id').values_list('name', 'location', 'member_count', 'owner__username'))
+        memberships = list(Membership.objects.order_by('id').values_list('user__username', 'club__name', 'role'))
+        return users, clubs, memberships
+
+    def test_seed_creates_requested_counts(self):
+        out = self._seed(users=30, clubs=4, members_per_club=12, seed=1, batch_size=7)
+        self.assertIn('Seeded 30 users, 4 clubs and 48 memberships: 82 rows in', out)
+        self.assertIn('rows/sec.', out)
+        self.assertEqual(User.objects.filter(username__endswith = f'@{SEED_EMAIL_DOMAIN}').count(), 30)
+        self.assertEqual(User.objects.count(), 30 + len(DEMO_USERS))
+        self.assertEqual(Club.objects.count(), 4 + len(DEMO_CLUBS))
+        generated = Club.objects.exclude(name__in = [club[0] for club in DEMO_CLUBS])
+        self.assertEqual(Membership.objects.filter(club__in = generated).count(), 48)
+
+    def test_seeded_clubs_are_consistent(self):
+        self._seed(users=30, clubs=4, members_per_club=12, seed=1, batch_size=7)
+        clubs = Club.objects.annotate(
+            members = Count('membership', filter = Q(membership__role__gte = Membership.Role.MEMBER)),
+            owners = Count('membership', filter = Q(membership__role = Membership.Role.OWNER)),
+        )
+        for club in clubs:
+            self.assertEqual(club.member_count, club.members)
+            self.assertEqual(club.owners, 1)
+            self.assertEqual(club.owner, Membership.objects.get(club = club, role = Membership.Role.OWNER).user)
+        generated = Club.objects.get(name__endswith = ' 1')
+        self.assertEqual(Membership.objects.filter(club = generated, role = Membership.Role.OFFICER).count(), 1)
+
+    def test_seeded_users_share_the_demo_password(self):
+        self._seed(users=3, clubs=0, members_per_club=0)
+        self.assertEqual(User.objects.values('password').distinct().count(), 1)
+        self.assertTrue(check_password(DEMO_PASSWORD, User.objects.first().password))
+        for user in User.objects.filter(username__endswith = f'@{SEED_EMAIL_DOMAIN}'):
+            self.assertEqual(user.email_hash, email_hash(user.username))
+
+    def test_same_seed_generates_same_data(self):
+        self._seed(users=25, clubs=3, members_per_club=5, seed=7, batch_size=4)
+        first = self._snapshot()
+        self._unseed()
+        self._seed(users=25, clubs=3, members_per_club=5, seed=7, batch_size=10)
+        self.assertEqual(self._snapshot(), first)
+
+    def test_worker_processes_generate_same_data(self):
+        self._seed(users=2500, clubs=40, members_per_club=60, seed=3)
+        first = self._snapshot()
+        self._unseed()
+        out = self._seed(users=2500, clubs=40, members_per_club=60, seed=3, workers=2, batch_size=1500)
+        self.assertEqual(self._snapshot(), first)
+        self.assertIn('Created 2500 of 2500 users', out)
+        self.assertIn('Created 40 of 40 clubs', out)
+
+    def test_ids_continue_after_seeded_rows(self):
+        self._seed(users=10, clubs=2, members_per_club=3)
+        last_user, last_club = User.objects.order_by('id').last(), Club.objects.order_by('id').last()
+        self.assertTrue(last_user.username.endswith(f'@{SEED_EMAIL_DOMAIN}'))
+        user = User.objects.create_user('new@example.org', first_name = 'New', last_name = 'User', password = 'Password123')
+        club = Club.objects.create(name = 'New Club', location = 'London')
+        self.assertGreater(user.id, last_user.id)
+        self.assertGreater(club.id, last_club.id)
+
+    def test_seeded_clubs_are_searchable(self):
+        self._seed(users=10, clubs=2, members_per_club=3)
+        club = Club.objects.order_by('id').last()
+        self.assertIn(club, list(search_clubs(club.name)))
+
+    def test_different_seed_generates_different_data(self):
+        self._seed(users=25, clubs=3, members_per_club=5, seed=7)
+        first = self._snapshot()
+        self._unseed()
+        self._seed(users=25, clubs=3, members_per_club=5, seed=8)
+        self.assertNotEqual(self._snapshot(), first)
+
+    def test_seed_rejects_more_members_per_club_than_users(self):
+        with self.assertRaises(CommandError):
+            self._seed(users=5, clubs=1, members_per_club=6)
+        self.assertEqual(User.objects.count(), 0)
+
+    def test_seed_rejects_negative_counts(self):
+        with self.assertRaises(CommandError):
+            self._seed(users=-1)
+        with self.assertRaises(CommandError):
+            self._seed(batch_size=0)
+        with self.assertRaises(CommandError):
+            self._seed(workers=0)
+
+    def test_seed_twice_skips_the_demo_data(self):
+        self._seed(users=0, clubs=0)
+        snapshot = self._snapshot()
+        out = self._seed(users=0, clubs=0)
+        self.assertIn('The demo accounts and clubs already exist, skipped them.', out)
+        self.assertEqual(self._snapshot(), snapshot)
+
+    def test_seed_generates_users_next_to_existing_demo_data(self):
+        self._seed(users=0, clubs=0)
+        self._seed(users=5, clubs=1, members_per_club=5)
+        self.assertEqual(User.objects.count(), 5 + len(DEMO_USERS))
+        self.assertEqual(Club.objects.count(), 1 + len(DEMO_CLUBS))
+
+    def test_seed_refuses_to_generate_users_twice(self):
+        self._seed(users=5, clubs=1, members_per_club=5)
+        with self.assertRaisesMessage(CommandError, 'Generated users already exist, run unseed first.'):
+            self._seed(users=5, clubs=1, members_per_club=5)
+        self.assertEqual(User.objects.count(), 5 + len(DEMO_USERS))
@@ -0,0 +1,106 @@
+"""Unit tests for the request timing middleware."""
+import re
+import time
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.test.utils import CaptureQueriesContext
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import reverse
+from clubs.models import User, Club
+from clubs.timing import RequestTiming, TimedDjangoTemplates
+
+SERVER_TIMING = re.compile(r'(\w+);(?:desc="([^"]*)";)?dur=([\d.]+)')
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE = 1)
+class RequestTimingMiddlewareTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/users.json', 'clubs/tests/fixtures/clubs.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.user.is_staff = True
+        self.user.save()
+        self.user.make_club_owner(Club.objects.get(name = 'TheGrand'))
+        self.client.login(username = self.user.username, password = 'Password123')
+
+    def _server_timing(self, response):
+        return {name: (description, float(duration)) for name, description, duration in SERVER_TIMING.findall(response['Server-Timing'])}
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('club_list'))
+        timings = self._server_timing(response)
+        self.assertEqual(set(timings), {'total', 'view', 'template', 'db'})
+        self.assertEqual(timings['db'][0], f'{len(queries)} queries')
+        self.assertGreater(timings['template'][1], 0)
+        self.assertLessEqual(timings['template'][1], timings['view'][1])
+        self.assertLessEqual(timings['view'][1], timings['total'][1])
+
+    def test_view_without_templates_has_no_template_time(self):
+        response = self.client.get(reverse('api_clubs'))
+        self.assertEqual(self._server_timing(response)['template'][1], 0)
+
+    def test_view_time_leaves_out_other_middleware(self):
+        process_response = XFrameOptionsMiddleware.process_response
+        def slow_process_response(middleware, request, response):
+            time.sleep(0.2)
+            return process_response(middleware, request, response)
+        with patch.object(XFrameOptionsMiddleware, 'process_response', slow_process_response):
+            response = self.client.get(reverse('api_clubs'))
+        timings = self._server_timing(response)
+        self.assertGreater(timings['view'][1], 0)
+        self.assertLess(timings['view'][1], 200)
+        self.assertGreaterEqual(timings['total'][1], 200)
+
+    def test_log_line_is_tagged_with_url_name(self):
+        with self.assertLogs('clubs.timing', 'INFO') as logs:
+            response = self.client.get(reverse('club_profile', kwargs = {'club_name': 'TheGrand'}))
+        self.assertEqual(len(logs.records), 1)
+        record = logs.records[0]
+        self.assertEqual(record.timing['url_name'], 'club_profile')
+        self.assertEqual(record.timing['status'], 200)
+        self.assertEqual(record.timing['path'], '/club_profile/TheGrand/')
+        self.assertEqual(record.timing['db_queries'], int(self._server_timing(response)['db'][0].split()[0]))
+        self.assertIn('url_name=club_profile method=GET', record.getMessage())
+
+    def test_server_timing_header_is_not_sent_to_other_users(self):
+        self.user.is_staff = False
+        self.user.save()
+        with self.assertLogs('clubs.timing', 'INFO') as logs:
+            response = self.client.get(reverse('club_list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(logs.records[0].timing['url_name'], 'club_list')
+
+    @override_settings(DEBUG = True)
+    def test_server_timing_header_is_sent_to_everyone_in_debug(self):
+        self.user.is_staff = False
+        self.user.save()
+        self.assertTrue(self.client.get(reverse('club_list')).has_header('Server-Timing'))
+
+    def test_missing_template_is_reported_by_the_timed_backend(self):
+        with self.assertRaises(TemplateDoesNotExist) as raised:
+            get_template('no_such_template.html')
+        self.assertIsInstance(raised.exception.chain[0].backend, TimedDjangoTemplates)
+
+    def test_unresolved_url_is_logged(self):
+        with self.assertLogs('clubs.timing', 'INFO') as logs:
+            response = self.client.get('/no_such_page/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(logs.records[0].timing['url_name'], '-')
+        self.assertEqual(logs.records[0].timing['view_ms'], 0)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE = 0)
+    def test_requests_left_out_of_the_sample_are_not_timed(self):
+        with self.assertNoLogs('clubs.timing', 'INFO'):
+            response = self.client.get(reverse('club_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_nested_renders_are_counted_once(self):
+        timing = RequestTiming()
+        with patch('clubs.timing.time.perf_counter', side_effect=[1.0, 3.0]):
+            self.assertEqual(timing.render(lambda: timing.render(lambda: 'page')), 'page')
+        self.assertEqual(timing.template, 2.0)
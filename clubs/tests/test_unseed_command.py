@@ -0,0 +1,49 @@
+"""Unit tests for the unseed management command."""
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from clubs.demo import SEED_EMAIL_DOMAIN
+from clubs.models import User, Club, Membership, ChangeCounter
+
+class UnseedCommandTest(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin@example.org', 'admin@example.org', 'Password123')
+
+    def _seed(self, **options):
+        call_command('seed', stdout=StringIO(), workers=1, **options)
+
+    def _unseed(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('unseed', stdout=out)
+        return out.getvalue(), len(queries)
+
+    def test_unseed_keeps_only_superusers(self):
+        self._seed(users=20, clubs=3, members_per_club=8)
+        users = User.objects.count() - 1
+        clubs = Club.objects.count()
+        memberships = Membership.objects.count()
+        out, _ = self._unseed()
+        self.assertIn(f'Deleted {users} users, {clubs} clubs and {memberships} memberships.', out)
+        self.assertEqual(list(User.objects.all()), [self.admin])
+        self.assertFalse(Club.objects.exists())
+        self.assertFalse(Membership.objects.exists())
+        self.assertEqual(ChangeCounter.objects.get(name = ChangeCounter.CLUBS_DELETED).value, 1)
+
+    def test_unseed_queries_do_not_grow_with_generated_rows(self):
+        # The first run creates the deleted clubs counter
+        self._unseed()
+        self._seed(users=5, clubs=1, members_per_club=4)
+        _, small = self._unseed()
+        self._seed(users=60, clubs=6, members_per_club=30)
+        _, large = self._unseed()
+        self.assertEqual(small, large)
+
+    def test_seed_runs_again_after_unseed(self):
+        self._seed(users=5, clubs=1, members_per_club=5)
+        self._unseed()
+        self._seed(users=5, clubs=1, members_per_club=5)
+        self.assertEqual(User.objects.filter(username__endswith = f'@{SEED_EMAIL_DOMAIN}').count(), 5)
@@ -74,3 +74,13 @@ class ApproveApplicationTest(TestCase):
         response_url = reverse('my_clubs')
         self.assertRedirects(response, response_url, status_code=302, target_status_code=200)
         self.assertTemplateUsed(response, 'my_clubs.html')
+
+    def test_approve_application_of_another_club(self):
+        other_club = Club.objects.get(name = 'ClubB')
+        self.other_member.club = other_club
+        self.other_member.save()
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, follow=True)
+        self.other_member.refresh_from_db()
+        self.assertFalse(self.other_member.is_member)
+        self.assertRedirects(response, reverse('my_clubs'), status_code=302, target_status_code=200)
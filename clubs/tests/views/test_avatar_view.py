@@ -0,0 +1,84 @@
+"""Tests of the avatar proxy view."""
+import os
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from clubs.models import User, email_hash
+from clubs.tests.helpers import AvatarStubServer, reverse_with_next
+
+class AvatarViewTestCase(TestCase):
+    """Tests of the avatar proxy view."""
+
+    fixtures = ['clubs/tests/fixtures/users.json']
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.upstream = AvatarStubServer()
+        cls.upstream.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.upstream.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(AVATAR_CACHE_DIR = self.cache_dir.name, AVATAR_UPSTREAM_URL = self.upstream.upstream_url)
+        self.settings.enable()
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.email_hash = email_hash(self.user.username)
+        self.url = self.user.mini_avatar()
+        self.upstream.requests.clear()
+        self.client.login(username = self.user.username, password = 'Password123')
+
+    def tearDown(self):
+        self.settings.disable()
+        self.cache_dir.cleanup()
+
+    def test_avatar_url(self):
+        self.assertEqual(self.url, reverse('avatar', args=[self.email_hash, 60]))
+
+    def test_get_avatar(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, AvatarStubServer.image)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertRegex(response['ETag'], r'^"[0-9a-f]{64}"$')
+        self.assertIn('max-age=604800', response['Cache-Control'])
+
+    def test_get_avatar_with_matching_etag_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(self.upstream.requests), 1)
+
+    def test_placeholder_is_cached_briefly(self):
+        User.objects.filter(username = 'janedoe1@example.org').update(email_hash = AvatarStubServer.missing_hash)
+        response = self.client.get(reverse('avatar', args=[AvatarStubServer.missing_hash, 60]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+    def test_get_avatar_with_invalid_hash(self):
+        response = self.client.get(reverse('avatar', args=['not-a-hash', 60]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_avatar_with_invalid_size(self):
+        response = self.client.get(reverse('avatar', args=[self.email_hash, 5000]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('avatar', args=[self.email_hash, 77]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_avatar_of_unknown_hash_is_not_fetched(self):
+        response = self.client.get(reverse('avatar', args=['0' * 32, 60]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.upstream.requests, [])
+        self.assertEqual(os.listdir(self.cache_dir.name), [])
+
+    def test_get_avatar_redirects_when_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse_with_next('log_in', self.url), status_code=302, target_status_code=200)
+        self.assertEqual(self.upstream.requests, [])
@@ -0,0 +1,101 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from clubs.models import User, Membership, Club
+from clubs.tests.helpers import reverse_with_next
+
+class BulkApplicationTest(TestCase):
+
+    fixtures = [
+        'clubs/tests/fixtures/users.json',
+        'clubs/tests/fixtures/clubs.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='janedoe@example.org')
+        self.club = Club.objects.get(name = "TheGrand")
+        self.other_club = Club.objects.get(name = "ClubB")
+        self.officer = Membership.objects.create(user = self.user, club = self.club, is_applicant = True, is_member = True, is_officer = True)
+        self.applications = []
+        for user_id in range(5):
+            applicant = User.objects.create_user(
+                f'user{user_id}@example.org',
+                password='Password123',
+                first_name=f'First{user_id}',
+                last_name=f'Last{user_id}',
+                statement=f'Statement{user_id}',
+            )
+            self.applications.append(Membership.objects.create(user = applicant, club = self.club, is_applicant = True))
+        self.other_application = Membership.objects.create(user = User.objects.get(username='janedoe1@example.org'), club = self.other_club, is_applicant = True)
+        self.url = reverse('bulk_application', kwargs={'club_name': self.club.name})
+        self.list_url = reverse('application_list', kwargs={'club_name': self.club.name})
+
+    def test_bulk_application_url(self):
+        self.assertEqual(self.url, f'/bulk_application/{self.club.name}/')
+
+    def test_bulk_application_redirects_when_not_logged_in(self):
+        redirect_url = reverse_with_next('log_in', self.url)
+        response = self.client.post(self.url, {'action': 'approve', 'select_all': 'on'})
+        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
+
+    def test_bulk_approve_selected_applications(self):
+        self.client.login(username=self.user.username, password='Password123')
+        selected = [self.applications[0].id, self.applications[1].id, self.other_application.id]
+        response = self.client.post(self.url, {'action': 'approve', 'applications': selected}, follow=True)
+        self.assertRedirects(response, self.list_url, status_code=302, target_status_code=200)
+        self.assertContains(response, 'Approved 2 application(s).')
+        self.assertEqual(Membership.objects.members().filter(club = self.club).count(), 3)
+        self.other_application.refresh_from_db()
+        self.assertFalse(self.other_application.is_member)
+
+    def test_bulk_reject_all_pending_applications(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.post(self.url, {'action': 'reject', 'select_all': 'on'}, follow=True)
+        self.assertContains(response, 'Rejected 5 application(s).')
+        self.assertEqual(Membership.objects.filter(club = self.club).count(), 1)
+        self.assertTrue(Membership.objects.filter(id = self.other_application.id).exists())
+
+    def test_bulk_approve_uses_one_update(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.client.get(self.list_url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {'action': 'approve', 'select_all': 'on'})
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "clubs_membership"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 6)
+
+    def test_bulk_reject_uses_one_delete(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.client.get(self.list_url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {'action': 'reject', 'select_all': 'on'})
+        deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 1)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 1)
+
+    def test_reject_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(Membership.objects.filter(club = self.club).reject(), 5)
+        self.assertEqual(Membership.objects.filter(club = self.club).get(), self.officer)
+
+    def test_approve_counts_each_application_once(self):
+        applications = Membership.objects.filter(id__in = [self.applications[0].id, self.other_application.id])
+        self.assertEqual(applications.approve(), 2)
+        self.assertEqual(applications.approve(), 0)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).member_count, 2)
+        self.assertEqual(Club.objects.get(pk = self.other_club.pk).member_count, 1)
+
+    def test_bulk_application_with_empty_selection(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.post(self.url, {'action': 'approve'}, follow=True)
+        self.assertContains(response, 'Select at least one application.')
+        self.assertEqual(Membership.objects.applications().filter(club = self.club).count(), 5)
+
+    def test_bulk_application_not_as_officer(self):
+        self.officer.is_officer = False
+        self.officer.save()
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.post(self.url, {'action': 'approve', 'select_all': 'on'}, follow=True)
+        self.assertRedirects(response, reverse('access_denied'), status_code=302, target_status_code=200)
+        self.assertEqual(Membership.objects.applications().filter(club = self.club).count(), 5)
@@ -48,6 +48,19 @@ class Club_Home_Test(TestCase):
         self.assertContains(response, "View Members")
         self.assertNotContains(response, "Manage Applications")
 
+    def test_get_club_home_with_invalid_club(self):
+        self.client.login(username=self.member_user.username, password='Password123')
+        url = reverse('club_home', kwargs={'club_name': 'Not a club'})
+        response = self.client.get(url, follow=True)
+        self.assertRedirects(response, reverse('access_denied'), status_code=302, target_status_code=200)
+
+    def test_get_club_home_resolves_membership_once(self):
+        self.client.login(username=self.member_user.username, password='Password123')
+        self.client.get(self.url)
+        # session, user, membership with club, navbar clubs
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
     def test_get_club_home_as_not_member_fails(self):
         self.member_user_club.is_member=False
         self.member_user_club.save()
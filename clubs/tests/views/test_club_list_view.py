@@ -1,7 +1,11 @@
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from clubs.models import User, Club, Membership
+from clubs.pagination import encode_cursor
 from clubs.tests.helpers import reverse_with_next
 
 class ClubListTest(TestCase):
@@ -9,6 +13,7 @@ class ClubListTest(TestCase):
     fixtures = ['clubs/tests/fixtures/clubs.json', 'clubs/tests/fixtures/users.json']
 
     def setUp(self):
+        cache.clear()
         self.url = reverse('club_list')
         self.user = User.objects.get(username = 'janedoe@example.org')
         self.club = Club.objects.get(name = 'TheGrand')
@@ -32,13 +37,135 @@ class ClubListTest(TestCase):
             club_url = reverse('club_profile', kwargs={'club_name': club.name})
             self.assertContains(response, club_url)
 
+    def test_get_club_list_shows_owner(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertContains(response, f'{self.user.full_name()}</p>', count=2)
+
+    def test_get_club_list_query_count_does_not_grow_with_clubs(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self._create_test_clubs(2)
+        with CaptureQueriesContext(connection) as few_clubs:
+            self.client.get(self.url)
+        self._create_test_clubs(10, start=2)
+        with CaptureQueriesContext(connection) as many_clubs:
+            self.client.get(self.url)
+        self.assertEqual(len(few_clubs), len(many_clubs))
+
+    def test_get_club_list_is_paginated_by_cursor(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self._create_test_clubs(5)
+        response = self.client.get(self.url, {'page_size': 3})
+        first_page = list(response.context['all_clubs'])
+        self.assertEqual([club.name for club in first_page], ['ClubB', 'TheGrand', 'Club0'])
+        next_cursor = response.context['all_clubs'].next_cursor
+        self.assertContains(response, f'after={next_cursor}')
+        response = self.client.get(self.url, {'page_size': 3, 'after': next_cursor})
+        second_page = [club.name for club in response.context['all_clubs']]
+        self.assertEqual(second_page, ['Club1', 'Club2', 'Club3'])
+        response = self.client.get(self.url, {'page_size': 3, 'after': response.context['all_clubs'].next_cursor})
+        self.assertEqual([club.name for club in response.context['all_clubs']], ['Club4'])
+        self.assertFalse(response.context['all_clubs'].has_next())
+        self.assertNotContains(response, 'Next page')
+
+    def test_get_club_list_sorted_by_size(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self._create_test_clubs(3)
+        other_user = User.objects.get(username = 'janedoe1@example.org')
+        Membership.objects.create(user = other_user, club = Club.objects.get(name = 'Club1'), is_member = True)
+        response = self.client.get(self.url, {'sort': 'size', 'page_size': 2})
+        self.assertEqual([club.name for club in response.context['all_clubs']], ['Club1', 'TheGrand'])
+        self.assertContains(response, 'Members: 2')
+        response = self.client.get(self.url, {'sort': 'size', 'page_size': 2, 'after': response.context['all_clubs'].next_cursor})
+        self.assertEqual([club.name for club in response.context['all_clubs']], ['ClubB', 'Club0'])
+
+    def test_get_club_list_page_size_is_limited(self):
+        self.client.login(username=self.user.username, password='Password123')
+        with self.settings(CLUB_LIST_MAX_PAGE_SIZE=4):
+            self._create_test_clubs(5)
+            response = self.client.get(self.url, {'page_size': 1000})
+        self.assertEqual(len(response.context['all_clubs']), 4)
+
+    def test_get_club_list_with_invalid_cursor(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, {'after': 'not-a-cursor'})
+        self.assertRedirects(response, self.url, status_code=302, target_status_code=200)
+
+    def test_get_club_list_with_cursor_of_another_sort(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self._create_test_clubs(5)
+        cursor = self.client.get(self.url, {'page_size': 2}).context['all_clubs'].next_cursor
+        for query in [{'sort': 'size', 'after': cursor}, {'after': encode_cursor(['notadate', 1])}]:
+            response = self.client.get(self.url, query)
+            self.assertRedirects(response, self.url, status_code=302, target_status_code=200)
+
     def test_get_club_list_redirects_when_not_logged_in(self):
         redirect_url = reverse_with_next('log_in', self.url)
         response = self.client.get(self.url)
         self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
 
-    def _create_test_clubs(self, club_count=5):
-        for club_id in range(club_count):
+    def test_get_club_list_reuses_cached_club_cards(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.client.get(self.url)
+        Club.objects.filter(pk = self.club.pk).update(description = 'Changed behind the cache')
+        self.assertNotContains(self.client.get(self.url), 'Changed behind the cache')
+        Club.objects.filter(pk = self.club.pk).bump_version()
+        self.assertContains(self.client.get(self.url), 'Changed behind the cache')
+
+    def test_get_club_list_after_club_edit_shows_new_card(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.client.get(self.url)
+        self.club.description = 'A new description'
+        self.club.save()
+        self.assertContains(self.client.get(self.url), 'A new description')
+
+    def test_get_club_list_after_owner_rename_shows_new_card(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.client.get(self.url)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertContains(self.client.get(self.url), 'Renamed Doe</p>', count=2)
+
+    def test_get_unchanged_club_list_is_not_modified(self):
+        self.client.login(username=self.user.username, password='Password123')
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_get_club_list_after_new_member_is_modified(self):
+        self.client.login(username=self.user.username, password='Password123')
+        etag = self.client.get(self.url)['ETag']
+        other_user = User.objects.get(username = 'janedoe1@example.org')
+        Membership.objects.create(user = other_user, club = self.club, is_member = True)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_club_list_after_club_deleted_is_modified(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self._create_test_clubs(2)
+        etag = self.client.get(self.url)['ETag']
+        Club.objects.get(name = 'Club0').delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'The best0')
+
+    def test_revalidating_club_list_does_not_count_clubs(self):
+        self.client.login(username=self.user.username, password='Password123')
+        etag = self.client.get(self.url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([query['sql'] for query in queries if 'COUNT("clubs_club"' in query['sql']])
+
+    def test_get_club_list_etag_differs_between_users(self):
+        self.client.login(username=self.user.username, password='Password123')
+        etag = self.client.get(self.url)['ETag']
+        self.client.login(username='janedoe1@example.org', password='Password123')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 200)
+
+    def _create_test_clubs(self, club_count=5, start=0):
+        for club_id in range(start, start + club_count):
             name=f'Club{club_id}'
             description=f'The best{club_id}'
             location='London'
@@ -49,6 +49,45 @@ class Club_Profile_Test(TestCase):
         response = self.client.get(self.url)
         self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
 
+    def test_get_club_profile_sends_validators(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_get_unchanged_club_profile_is_not_modified(self):
+        self.client.login(username=self.user.username, password='Password123')
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.templates)
+
+    def test_get_club_profile_since_last_modified_is_not_modified(self):
+        self.client.login(username=self.user.username, password='Password123')
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE = last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_get_club_profile_after_club_edit_is_modified(self):
+        self.client.login(username=self.user.username, password='Password123')
+        etag = self.client.get(self.url)['ETag']
+        self.club.description = 'A new description'
+        self.club.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'A new description')
+
+    def test_get_club_profile_after_owner_edit_is_modified(self):
+        self.client.login(username=self.user.username, password='Password123')
+        etag = self.client.get(self.url)['ETag']
+        self.user.bio = 'A new bio'
+        self.user.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 200)
+
     def _create_test_users(self, user_count = 10):
         for user_id in range(user_count):
             self.user2 = User.objects.create_user(
@@ -0,0 +1,44 @@
+from django.test import TestCase
+from django.urls import reverse
+from clubs.models import User, Club, Membership
+from clubs.tests.helpers import reverse_with_next
+
+class ClubSearchTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/clubs.json', 'clubs/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.url = reverse('club_search')
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.club = Club.objects.get(name = 'TheGrand')
+        Membership(user = self.user, club = self.club, is_applicant = True, is_member = True, is_officer = True, is_owner = True).save()
+
+    def test_club_search_url(self):
+        self.assertEqual(self.url, '/club_search/')
+
+    def test_get_club_search(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'thegr'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'club_search.html')
+        self.assertContains(response, 'The best')
+        self.assertContains(response, 'Jane Doe')
+        self.assertContains(response, reverse('club_profile', kwargs={'club_name': self.club.name}))
+        self.assertNotContains(response, 'Second best')
+
+    def test_get_club_search_without_results(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'nothing'})
+        self.assertContains(response, 'No clubs found.')
+
+    def test_get_club_search_paginates(self):
+        self.client.login(username=self.user.username, password='Password123')
+        response = self.client.get(self.url, {'q': 'london', 'page_size': 1})
+        results = response.context['results']
+        self.assertEqual(len(results), 1)
+        self.assertContains(response, f'after={results.next_cursor}')
+
+    def test_get_club_search_redirects_when_not_logged_in(self):
+        redirect_url = reverse_with_next('log_in', self.url)
+        response = self.client.get(self.url)
+        self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
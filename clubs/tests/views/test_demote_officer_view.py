@@ -73,3 +73,11 @@ class Demote_officer_test(TestCase):
         response_url = reverse('view_members', kwargs={'club_name': self.other_member.club.name})
         self.assertRedirects(response, response_url, status_code=302, target_status_code=200)
         self.assertTemplateUsed(response, 'view_members.html')
+
+    def test_demote_officer_on_own_owner_membership(self):
+        self.client.login(username=self.user.username, password='Password123')
+        url = reverse('demote_officer', kwargs={'club_name': self.club.name, 'user_id': self.member.id})
+        response = self.client.get(url, follow=True)
+        self.assertTemplateUsed(response, 'view_members.html')
+        self.assertTrue(Membership.objects.get(pk = self.member.pk).is_owner)
+        self.assertEqual(Club.objects.get(pk = self.club.pk).owner, self.user)
@@ -0,0 +1,73 @@
+import csv
+import io
+from django.test import TestCase
+from django.urls import reverse
+from clubs import views
+from clubs.models import User, Club, Membership
+from clubs.tests.helpers import reverse_with_next
+
+class ExportMembersTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/clubs.json', 'clubs/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.club = Club.objects.get(name = 'TheGrand')
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.user2 = User.objects.get(username = 'janedoe1@example.org')
+        self.owner = Membership.objects.create(user = self.user, club = self.club, is_owner = True)
+        self.member = Membership.objects.create(user = self.user2, club = self.club, is_member = True)
+        self.url = reverse('export_members', kwargs = {'club_name': self.club.name})
+
+    def _read_csv(self, response):
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_export_members_url(self):
+        self.assertEqual(self.url, f'/export_members/{self.club.name}/')
+
+    def test_export_members_as_owner(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="TheGrand-members.csv"')
+        rows = self._read_csv(response)
+        self.assertEqual(rows[0], ['First name', 'Last name', 'Email', 'Role', 'Chess XP', 'Bio', 'Statement'])
+        self.assertEqual(rows[1][2:4], [self.user.username, 'Owner'])
+        self.assertEqual(rows[2][2:4], [self.user2.username, 'Member'])
+        self.assertEqual(len(rows), 3)
+
+    def test_export_members_as_officer(self):
+        self.member.is_officer = True
+        self.member.save()
+        self.client.login(username = self.user2.username, password = 'Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_export_members_as_member_is_denied(self):
+        self.client.login(username = self.user2.username, password = 'Password123')
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('access_denied'), status_code=302, target_status_code=200)
+
+    def test_export_members_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse_with_next('log_in', self.url), status_code=302, target_status_code=200)
+
+    def test_export_members_excludes_applicants(self):
+        applicant = User.objects.create_user('applicant@example.org', first_name = 'App', last_name = 'Licant', statement = 'Hi', password = 'Password123')
+        applicant.apply_club(self.club)
+        self.client.login(username = self.user.username, password = 'Password123')
+        rows = self._read_csv(self.client.get(self.url))
+        self.assertNotIn('applicant@example.org', [row[2] for row in rows])
+
+    def test_export_members_escapes_formulas(self):
+        self.user2.bio = '=HYPERLINK("http://example.org")'
+        self.user2.save()
+        self.client.login(username = self.user.username, password = 'Password123')
+        rows = self._read_csv(self.client.get(self.url))
+        self.assertEqual(rows[2][5], "'" + self.user2.bio)
+
+    def test_export_members_streams_in_chunks(self):
+        chunks = list(views.csv_chunks(['Heading'], ([row] for row in range(5)), 2))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(''.join(chunks).split(), ['Heading', '0', '1', '2', '3', '4'])
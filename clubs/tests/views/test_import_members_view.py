@@ -0,0 +1,70 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from clubs.models import User, Club, Membership
+from clubs.tests.helpers import reverse_with_next
+
+class ImportMembersTest(TestCase):
+
+    fixtures = ['clubs/tests/fixtures/clubs.json', 'clubs/tests/fixtures/users.json']
+
+    def setUp(self):
+        self.club = Club.objects.get(name = 'TheGrand')
+        self.user = User.objects.get(username = 'janedoe@example.org')
+        self.user2 = User.objects.get(username = 'janedoe1@example.org')
+        Membership.objects.create(user = self.user, club = self.club, is_owner = True)
+        self.officer = Membership.objects.create(user = self.user2, club = self.club, is_officer = True)
+        self.url = reverse('import_members', kwargs = {'club_name': self.club.name})
+
+    def _upload(self, content):
+        return SimpleUploadedFile('roster.csv', content, content_type='text/csv')
+
+    def test_import_members_url(self):
+        self.assertEqual(self.url, f'/import_members/{self.club.name}/')
+
+    def test_get_import_members(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'import_members.html')
+
+    def test_get_import_members_as_officer_is_denied(self):
+        self.client.login(username = self.user2.username, password = 'Password123')
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('access_denied'), status_code=302, target_status_code=200)
+
+    def test_get_import_members_redirects_when_not_logged_in(self):
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse_with_next('log_in', self.url), status_code=302, target_status_code=200)
+
+    def test_post_import_members(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        roster = self._upload(b'\xef\xbb\xbffirst_name,last_name,email,statement,role\n'
+            b'Ann,Smith,ann@example.org,Hi,member\n'
+            b'Bob,Jones,bob@example.org,,member\n')
+        response = self.client.post(self.url, {'roster': roster}, follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Created 1 users and 1 memberships.')
+        self.assertContains(response, 'Rejected 1 row(s).')
+        self.assertContains(response, 'Line 3')
+        self.assertTrue(Membership.objects.filter(club = self.club, user__username = 'ann@example.org').exists())
+
+    def test_post_import_members_lists_existing_accounts(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        roster = self._upload(b'first_name,last_name,email,statement,role\n'
+            b'Jane,Doe,janedoe2@example.org,Hi,officer\n')
+        response = self.client.post(self.url, {'roster': roster}, follow=True)
+        self.assertContains(response, '1 row(s) matched existing accounts, added as applicants only.')
+        self.assertContains(response, '<td>janedoe2@example.org</td>', html=True)
+        self.assertTrue(Membership.objects.get(club = self.club, user__username = 'janedoe2@example.org').is_applicant)
+        self.assertFalse(Membership.objects.get(club = self.club, user__username = 'janedoe2@example.org').is_member)
+
+    def test_post_import_members_with_unreadable_file(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        response = self.client.post(self.url, {'roster': self._upload(b'first_name\n\xff\xfe\n')})
+        self.assertContains(response, 'not a readable UTF-8 CSV file')
+
+    def test_club_home_links_to_import_for_owner(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+        response = self.client.get(reverse('club_home', kwargs = {'club_name': self.club.name}))
+        self.assertContains(response, self.url)
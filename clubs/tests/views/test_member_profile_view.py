@@ -22,19 +22,7 @@ class ShowUserTest(TestCase, LogInTester):
         )
 
         self.club_user.save()
-        self.club2 = Club.objects.get(name = 'TheGrand')
-
-        self.club_user2 = Membership.objects.create(
-            user = self.user,
-            club = self.club2,
-            is_applicant = True,
-            is_member = True,
-            is_officer = False,
-            is_owner = False
-        )
-
         self.club2 = Club.objects.get(name = 'ClubB')
-        self.club_user2.save()
 
         Membership(user = self.user, club = self.club2, is_applicant = True, is_member = True, is_officer = True, is_owner = True).save()
         self.url = reverse('member_profile', kwargs = {'user_id': self.user.id})
@@ -1,5 +1,8 @@
 from django.conf import settings
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from clubs.models import User, Club, Membership
 from clubs.tests.helpers import reverse_with_next
@@ -9,6 +12,7 @@ class MyClubsTest(TestCase):
     fixtures = ['clubs/tests/fixtures/clubs.json', 'clubs/tests/fixtures/users.json']
 
     def setUp(self):
+        cache.clear()
         self.club = Club.objects.get(name = 'TheGrand')
         self.user = User.objects.get(username = 'janedoe@example.org')
         self.no_club_user = User.objects.get(username = 'janedoe1@example.org')
@@ -39,6 +43,48 @@ class MyClubsTest(TestCase):
             club_url = reverse('club_home', kwargs={'club_name': my_club.name})
             self.assertContains(response, club_url)
 
+    def test_get_my_clubs_query_count_does_not_grow_with_clubs(self):
+        self.client.login(username=self.user.username, password='Password123')
+        with CaptureQueriesContext(connection) as one_club:
+            self.client.get(self.url)
+        for club in self._create_test_clubs(5):
+            self.user.make_club_owner(club)
+        with CaptureQueriesContext(connection) as many_clubs:
+            response = self.client.get(self.url)
+        self.assertEqual(len(one_club), len(many_clubs))
+        self.assertContains(response, f'{self.user.full_name()}</p>', count=6)
+
+    def test_get_my_clubs_after_ownership_transfer_shows_new_owner(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.client.get(self.url)
+        officer = Membership.objects.create(user = self.no_club_user, club = self.club, is_officer = True)
+        self.club_user.transfer_ownership(officer)
+        self.assertContains(self.client.get(self.url), f'{self.no_club_user.full_name()}</p>')
+
+    @override_settings(JOINED_CLUBS_CACHE_TIMEOUT=300)
+    def test_cached_my_clubs_shows_other_members_the_new_owner_and_count(self):
+        member = User.objects.get(username = 'janedoe2@example.org')
+        Membership.objects.create(user = member, club = self.club, is_member = True)
+        self.client.login(username=member.username, password='Password123')
+        self.assertContains(self.client.get(self.url), 'Members: 2</p>')
+        self.no_club_user.first_name = 'Newowner'
+        self.no_club_user.save()
+        officer = Membership.objects.create(user = self.no_club_user, club = self.club, is_officer = True)
+        self.club_user.transfer_ownership(officer)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Newowner Doe</p>')
+        self.assertContains(response, 'Members: 3</p>')
+
+    @override_settings(JOINED_CLUBS_CACHE_TIMEOUT=300)
+    def test_cached_my_clubs_shows_other_members_approved_applicants(self):
+        self.client.login(username=self.user.username, password='Password123')
+        self.assertContains(self.client.get(self.url), 'Members: 1</p>')
+        Membership.objects.create(user = self.no_club_user, club = self.club)
+        Membership.objects.filter(club = self.club).approve()
+        self.assertContains(self.client.get(self.url), 'Members: 2</p>')
+        Club.add_members(self.club.id, 3)
+        self.assertContains(self.client.get(self.url), 'Members: 5</p>')
+
     def test_get_user_empty_my_clubs(self):
         self.client.login(username=self.no_club_user.username, password='Password123')
         response = self.client.get(self.url)
@@ -53,9 +99,12 @@ class MyClubsTest(TestCase):
         self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
 
     def _create_test_clubs(self, club_count=10):
+        clubs = []
         for club_id in range(club_count):
             name=f'Club{club_id}'
             description=f'The best{club_id}'
             location='London'
             club = Club(name=name,description=description,location=location)
             club.save()
+            clubs.append(club)
+        return clubs
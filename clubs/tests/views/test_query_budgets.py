@@ -0,0 +1,97 @@
+"""Query budgets of the pages and API endpoints, measured on a seeded database of realistic size.
+
+Every view is requested with assertNumQueries against a fixed budget, then
+again after more clubs, members and applications have been added, which
+must not cost a single extra query. Each request must also finish within a
+generous time budget, to catch a view that stops using the indexes."""
+import time
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from clubs.models import User, Club, Membership
+
+SEED_USERS = 400
+SEED_CLUBS = 200
+SEED_MEMBERS_PER_CLUB = 20
+SEED_APPLICANTS = 30
+
+# Seconds any one request may take, far above what these pages need
+VIEW_TIME_BUDGET = 2.0
+
+# URL name, URL arguments (filled in from the viewer's club), query string, queries
+QUERY_BUDGETS = [
+    ('club_list', {}, '', 5),
+    ('club_list', {}, '?sort=size', 5),
+    ('club_search', {}, '?q=club', 5),
+    ('my_clubs', {}, '', 3),
+    ('club_home', {'club_name'}, '', 4),
+    ('club_profile', {'club_name'}, '', 6),
+    ('view_members', {'club_name'}, '', 6),
+    ('view_members', {'club_name'}, '?sort=chess_xp', 6),
+    ('application_list', {'club_name'}, '', 5),
+    ('export_members', {'club_name'}, '', 4),
+    ('member_profile', {'user_id'}, '', 4),
+    ('change_profile', {}, '', 2),
+    ('create_club', {}, '', 2),
+    ('api_clubs', {}, '', 3),
+    ('api_club_detail', {'club_name'}, '', 3),
+    ('api_club_members', {'club_name'}, '', 4),
+    ('api_my_memberships', {}, '', 3),
+]
+
+class QueryBudgetTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed', users=SEED_USERS, clubs=SEED_CLUBS, members_per_club=SEED_MEMBERS_PER_CLUB, workers=1, stdout=StringIO())
+        cls.club = Club.objects.get(name__endswith = ' 1')
+        cls.user = cls.club.owner
+        applicants = User.objects.exclude(membership__club = cls.club).order_by('id')[:SEED_APPLICANTS]
+        Membership.objects.bulk_create([Membership(user = user, club = cls.club, role = Membership.Role.APPLICANT) for user in applicants])
+
+    def setUp(self):
+        self.client.login(username = self.user.username, password = 'Password123')
+
+    def _url(self, name, arguments, query):
+        values = {'club_name': self.club.name, 'user_id': self.user.id}
+        return reverse(name, kwargs = {argument: values[argument] for argument in arguments}) + query
+
+    def _get(self, url):
+        cache.clear()
+        started = time.perf_counter()
+        response = self.client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response, time.perf_counter() - started
+
+    def _grow(self):
+        """Add clubs, members, applications and memberships of the viewer's own."""
+        users = list(User.objects.order_by('-id')[:60])
+        for index in range(40):
+            club = Club.objects.create(name = f'Grown {index}', location = 'London', description = 'Grown club')
+            Membership.objects.create(user = users[index], club = club, role = Membership.Role.OWNER)
+            Membership.objects.create(user = users[index + 1], club = club, role = Membership.Role.OFFICER)
+            if index < 10:
+                Membership.objects.create(user = self.user, club = club, role = Membership.Role.MEMBER)
+        for user in User.objects.exclude(membership__club = self.club).order_by('id')[:40]:
+            Membership.objects.create(user = user, club = self.club, role = Membership.Role.MEMBER)
+        for user in User.objects.exclude(membership__club = self.club).order_by('id')[:20]:
+            Membership.objects.create(user = user, club = self.club, role = Membership.Role.APPLICANT)
+
+    def _assert_within_budgets(self):
+        for name, arguments, query, budget in QUERY_BUDGETS:
+            url = self._url(name, arguments, query)
+            with self.subTest(url = url):
+                with self.assertNumQueries(budget):
+                    response, elapsed = self._get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertLess(elapsed, VIEW_TIME_BUDGET)
+
+    def test_views_stay_within_query_budget(self):
+        self._assert_within_budgets()
+
+    def test_query_budget_does_not_grow_with_data(self):
+        self._grow()
+        self._assert_within_budgets()
@@ -35,7 +35,8 @@ class TransferOwnershipTest(TestCase):
         is_member_owner_before = self.member.is_owner
         is_other_member_owner_before = self.other_member.is_owner
         response = self.client.get(self.url, follow=True)
-        self.member.transfer_ownership(self.other_member)
+        self.member.refresh_from_db()
+        self.other_member.refresh_from_db()
         is_member_owner_after = self.member.is_owner
         is_other_member_owner_after = self.other_member.is_owner
         self.assertTrue(is_member_owner_before)
@@ -69,7 +70,8 @@ class TransferOwnershipTest(TestCase):
         is_member_owner_before = self.member.is_owner
         is_other_member_owner_before = self.other_member.is_owner
         response = self.client.get(self.url, follow=True)
-        self.other_member.transfer_ownership(self.member)
+        self.member.refresh_from_db()
+        self.other_member.refresh_from_db()
         is_member_owner_after = self.member.is_owner
         is_other_member_owner_after = self.other_member.is_owner
         self.assertTrue(is_member_owner_before)
@@ -1,6 +1,9 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from clubs.models import User, Club, Membership
+from clubs.pagination import encode_cursor
 from clubs.tests.helpers import LogInTester
 
 class ViewMembersTest(TestCase, LogInTester):
@@ -51,6 +54,46 @@ class ViewMembersTest(TestCase, LogInTester):
             self.assertNotContains(response, f'Statement{user_id}')
             self.assertNotContains(response, f'Chess XP: {user_id}')
 
+    def test_get_view_members_is_paginated_by_name(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        self._create_test_users(5)
+        response = self.client.get(self.url, {'page_size': 3})
+        members = response.context['members']
+        self.assertEqual([member.user.first_name for member in members], ['First0', 'First1', 'First2'])
+        response = self.client.get(self.url, {'page_size': 3, 'after': members.next_cursor})
+        members = response.context['members']
+        self.assertEqual([member.user.first_name for member in members], ['First3', 'First4'])
+        self.assertFalse(members.has_next())
+
+    def test_get_view_members_sorted_by_chess_xp(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        self._create_test_users(5)
+        response = self.client.get(self.url, {'sort': 'chess_xp', 'page_size': 2})
+        members = response.context['members']
+        self.assertEqual([member.user.chess_xp for member in members], [4, 3])
+        response = self.client.get(self.url, {'sort': 'chess_xp', 'page_size': 2, 'after': members.next_cursor})
+        self.assertEqual([member.user.chess_xp for member in response.context['members']], [2, 1])
+
+    def test_get_view_members_query_count_does_not_grow_with_members(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        self._create_test_users(2)
+        with CaptureQueriesContext(connection) as few_members:
+            self.client.get(self.url)
+        self._create_test_users(15, start=2)
+        with CaptureQueriesContext(connection) as many_members:
+            self.client.get(self.url)
+        self.assertEqual(len(few_members), len(many_members))
+
+    def test_get_view_members_with_invalid_cursor(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        response = self.client.get(self.url, {'after': 'not-a-cursor'})
+        self.assertRedirects(response, self.url, status_code=302, target_status_code=200)
+
+    def test_get_view_members_with_cursor_values_of_the_wrong_type(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        response = self.client.get(self.url, {'sort': 'chess_xp', 'after': encode_cursor(['x', 1])})
+        self.assertRedirects(response, self.url, status_code=302, target_status_code=200)
+
     def test_get_view_members_redirects_when_user_is_not_member(self):
         self.member.is_officer = False
         self.member.is_member = False
@@ -60,8 +103,62 @@ class ViewMembersTest(TestCase, LogInTester):
         redirect_url = reverse('access_denied')
         self.assertRedirects(response, redirect_url, status_code=302, target_status_code=200)
 
-    def _create_test_users(self, user_count):
-        for user_id in range(user_count):
+    def test_get_view_members_as_officer_links_to_export(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        response = self.client.get(self.url)
+        self.assertContains(response, reverse('export_members', kwargs={'club_name': self.club.name}))
+
+    def test_get_unchanged_view_members_is_not_modified(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        self._create_test_users(5)
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.templates)
+
+    def test_get_view_members_after_member_leaves_is_modified(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        self._create_test_users(5)
+        etag = self.client.get(self.url)['ETag']
+        User.objects.get(username = 'user0@example.org').delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'user0@example.org')
+
+    def test_get_view_members_after_member_edit_is_modified(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        self._create_test_users(5)
+        etag = self.client.get(self.url)['ETag']
+        member = User.objects.get(username = 'user0@example.org')
+        member.bio = 'A new bio'
+        member.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertContains(response, 'A new bio')
+
+    def test_get_view_members_after_member_promoted_is_modified(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        self._create_test_users(2)
+        etag = self.client.get(self.url)['ETag']
+        member = Membership.objects.get(user__username = 'user0@example.org')
+        member.is_officer = True
+        member.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_revalidating_view_members_reads_only_the_club(self):
+        self.client.login(username = self.user.username, password = "Password123")
+        self._create_test_users(5)
+        etag = self.client.get(self.url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH = etag)
+        self.assertEqual(response.status_code, 304)
+        validator = [query['sql'] for query in queries if '"summary0"' in query['sql']]
+        self.assertEqual(len(validator), 1)
+        self.assertEqual(validator[0].count("'TheGrand'"), 1)
+        self.assertIn('FROM "clubs_club" U0 WHERE U0."name" = \'TheGrand\'', validator[0])
+
+    def _create_test_users(self, user_count, start=0):
+        for user_id in range(start, start + user_count):
             user = User.objects.create_user(
                 f'user{user_id}@example.org',
                 password='Password123',
@@ -0,0 +1,157 @@
+"""Per-request timing of views, template rendering and SQL.
+
+RequestTimingMiddleware instruments a sample of requests, the fraction set
+by REQUEST_TIMING_SAMPLE_RATE. For each one it records the total time, the
+view time measured by ViewTimingMiddleware, the time spent rendering templates and the number and duration of SQL queries. They are
+logged at INFO on the clubs.timing logger tagged with the URL name. When
+DEBUG is on, or the user is staff, they are also sent back in a
+Server-Timing header, which browsers show in their network panel; other
+clients are not shown how long the database took. Queries run and
+templates rendered while a streaming response is being sent happen after
+the headers have gone, so they are not counted.
+
+ViewTimingMiddleware should come last in MIDDLEWARE: the view time runs
+from its process_view to the response coming back to it, so it covers the
+view and the rendering of a TemplateResponse but no other middleware.
+Without it the view time is left at zero.
+
+Templates are timed by TimedDjangoTemplates, which must be the template
+backend. Requests left out of the sample cost one random number."""
+import contextvars
+import logging
+import random
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('clubs.timing')
+
+_current_timing = contextvars.ContextVar('request_timing', default=None)
+
+class RequestTiming:
+    """Timings of one request, in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.view = 0.0
+        self.template = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self._view_started = None
+        self._rendering = False
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+    def render(self, render, *args):
+        """Time a template render, counting templates rendered inside it only once."""
+        if self._rendering:
+            return render(*args)
+        self._rendering = True
+        started = time.perf_counter()
+        try:
+            return render(*args)
+        finally:
+            self.template += time.perf_counter() - started
+            self._rendering = False
+
+    def server_timing(self):
+        """Return the value of a Server-Timing header, durations in milliseconds."""
+        return ', '.join([
+            f'total;dur={self.total * 1000:.2f}',
+            f'view;dur={self.view * 1000:.2f}',
+            f'template;dur={self.template * 1000:.2f}',
+            f'db;desc="{self.queries} queries";dur={self.db * 1000:.2f}',
+        ])
+
+    def log_fields(self, request, response):
+        match = request.resolver_match
+        return {
+            'url_name': match.view_name if match else '-',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(self.total * 1000, 2),
+            'view_ms': round(self.view * 1000, 2),
+            'template_ms': round(self.template * 1000, 2),
+            'db_ms': round(self.db * 1000, 2),
+            'db_queries': self.queries,
+        }
+
+class TimedTemplate(Template):
+    """A Django template adding its render time to the current request's timing."""
+
+    def render(self, context=None, request=None):
+        timing = _current_timing.get()
+        if timing is None:
+            return super().render(context, request)
+        return timing.render(super().render, context, request)
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with templates timed by RequestTimingMiddleware."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+def show_server_timing(request):
+    """Return whether the response may reveal its timings: in DEBUG, or to staff."""
+    user = getattr(request, 'user', None)
+    return settings.DEBUG or bool(user and user.is_staff)
+
+class RequestTimingMiddleware:
+    """Time a sample of requests; it should come first in MIDDLEWARE so the total covers the other middleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+        timing = RequestTiming()
+        request._timing = timing
+        token = _current_timing.set(timing)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing.record_query))
+                response = self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+        timing.total = time.perf_counter() - timing.started
+        if show_server_timing(request):
+            response['Server-Timing'] = timing.server_timing()
+        fields = timing.log_fields(request, response)
+        logger.info(' '.join(f'{key}={value}' for key, value in fields.items()), extra={'timing': fields})
+        return response
+
+class ViewTimingMiddleware:
+    """Time the view of a request timed by RequestTimingMiddleware; it should come last in MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        timing = getattr(request, '_timing', None)
+        if timing is not None and timing._view_started is not None:
+            timing.view = time.perf_counter() - timing._view_started
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, '_timing', None)
+        if timing is not None:
+            timing._view_started = time.perf_counter()
+        return None
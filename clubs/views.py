@@ -1,15 +1,26 @@
+import csv
+import io
+import re
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, get_user_model,login,logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.hashers import check_password
 from django.contrib import messages
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from clubs.forms import Log_in_form
 from clubs.models import User
-from .forms import SignUpForm, Create_A_Club_Form, Log_in_form, UserForm, PasswordForm
-from clubs.models import Club, Membership
+from .forms import SignUpForm, Create_A_Club_Form, Log_in_form, UserForm, PasswordForm, BulkApplicationForm, RosterUploadForm
+from clubs.models import ChangeCounter, Club, Membership, OwnershipTransferError
 from .models import User
+from .context_processors import invalidate_joined_clubs, load_joined_clubs
+from .pagination import InvalidCursor, KeysetPaginator, clamp_page_size
+from .search import search_clubs
+from .avatars import get_avatar, valid_avatar
+from .conditional import change_count, conditional_page, latest_update
+from .roster_import import import_roster, read_uploaded_roster
 
 
 #This is a page that will be redirected too when a user doesnt have access to a url
@@ -25,12 +36,20 @@ def login_prohibited(view_function):
             return view_function(request)
     return modified_view_function
 
+def get_club_membership(request, club_name):
+    """Return the user's membership of the named club, fetched with its club in one query.
+
+    The membership is memoized on the request as request.membership, so the
+    role decorators and the decorated view share the same lookup."""
+    if not hasattr(request, 'membership'):
+        request.membership = Membership.objects.select_related('club').filter(user = request.user, club__name = club_name).first()
+    return request.membership
+
 """Redirect URL if you are not an owner"""
 def owner_required(view_function):
     def modified_view_function(request, club_name, **kwargs):
-        selected_club = Club.objects.get(name = club_name)
-        owner_user = Membership.objects.get(user=request.user, club = selected_club)
-        if not owner_user.is_owner:
+        owner_user = get_club_membership(request, club_name)
+        if owner_user is None or not owner_user.is_owner:
             return redirect('access_denied')
         else:
             return view_function(request, club_name, **kwargs)
@@ -39,9 +58,8 @@ def owner_required(view_function):
 """Redirect URL if you are not an officer"""
 def officer_required(view_function):
     def modified_view_function(request, club_name, **kwargs):
-        selected_club = Club.objects.get(name = club_name)
-        owner_user = Membership.objects.get(user=request.user, club = selected_club)
-        if not owner_user.is_officer:
+        officer_user = get_club_membership(request, club_name)
+        if officer_user is None or not officer_user.is_officer:
             return redirect('access_denied')
         else:
             return view_function(request, club_name, **kwargs)
@@ -50,9 +68,8 @@ def officer_required(view_function):
 """Redirect URL if you are not a member"""
 def member_required(view_function):
     def modified_view_function(request, club_name, **kwargs):
-        selected_club = Club.objects.get(name = club_name)
-        member_user = Membership.objects.filter(user=request.user, club = selected_club)
-        if not member_user.exists() or not member_user.get().is_member:
+        member_user = get_club_membership(request, club_name)
+        if member_user is None or not member_user.is_member:
             return redirect('access_denied')
         else:
             return view_function(request, club_name, **kwargs)
@@ -127,12 +144,8 @@ def home(request):
 @login_required
 @member_required
 def club_home(request, club_name):
-    club = Club.objects.get(name = club_name)
-    club_user = Membership.objects.all().get(user = request.user, club = club)
-    joined_clubs = Membership.objects.all().filter(user = request.user, is_member = True)
-    clubIDs = joined_clubs.values_list('club')
-    clubs = Club.objects.filter(id__in = clubIDs)
-    return render(request, 'club_home.html', {'clubs': clubs, 'club': club_name, 'clubUser': club_user})
+    club_user = request.membership
+    return render(request, 'club_home.html', {'club': club_name, 'clubUser': club_user})
 
 """View to log in"""
 @login_prohibited
@@ -152,29 +165,46 @@ def log_in(request):
     next = request.GET.get('next') or ''
     return render(request, 'log_in.html', {'form':form, 'next':next})
 
+CLUB_SORT_KEYS = {
+    'created': ('created_at', 'id'),
+    'size': ('-member_count', 'id'),
+}
+
+def club_list_sources(request):
+    return [latest_update(Club.objects.all()), change_count(ChangeCounter.CLUBS_DELETED)]
+
 """View for the club list page"""
 @login_required
+@conditional_page(club_list_sources)
 def club_list(request):
-    all_clubs = Club.objects.filter().order_by()
-    joined_clubs = Membership.objects.all().filter(user = request.user, is_member = True)
-    clubIDs = joined_clubs.values_list('club')
-    my_clubs = Club.objects.filter(id__in = clubIDs)
-    owner_dict = {}
-    for c in all_clubs:
-        owner_dict[c] = Membership.objects.all().get(club = c, is_owner = True)
-    return render(request, 'club_list.html', {'all_clubs':all_clubs, 'owners':owner_dict, 'clubs':my_clubs})
+    sort = request.GET.get('sort')
+    if sort not in CLUB_SORT_KEYS:
+        sort = 'created'
+    page_size = clamp_page_size(request.GET.get('page_size'), settings.CLUB_LIST_PAGE_SIZE, settings.CLUB_LIST_MAX_PAGE_SIZE)
+    paginator = KeysetPaginator(Club.objects.with_owner(), CLUB_SORT_KEYS[sort], page_size)
+    try:
+        all_clubs = paginator.page(request.GET.get('after'))
+    except InvalidCursor:
+        return redirect('club_list')
+    return render(request, 'club_list.html', {'all_clubs':all_clubs, 'page_size':page_size, 'sort':sort})
+
+"""View to search the club directory"""
+@login_required
+def club_search(request):
+    query = request.GET.get('q', '').strip()
+    page_size = clamp_page_size(request.GET.get('page_size'), settings.CLUB_LIST_PAGE_SIZE, settings.CLUB_LIST_MAX_PAGE_SIZE)
+    try:
+        results = search_clubs(query, request.GET.get('after'), page_size)
+    except InvalidCursor:
+        return redirect('club_list')
+    return render(request, 'club_search.html', {'query': query, 'results': results, 'page_size': page_size})
 
 """View for the my clubs page"""
 @login_required
 def my_clubs(request):
-    joined_clubs = Membership.objects.all().filter(user = request.user, is_member = True)
-    clubIDs = joined_clubs.values_list('club')
-    clubs = Club.objects.filter(id__in = clubIDs)
+    clubs = load_joined_clubs(request)
     user = request.user
-    owner_dict = {}
-    for c in clubs:
-        owner_dict[c] = Membership.objects.all().get(club = c, is_owner = True)
-    return render(request, 'my_clubs.html', {'clubs':clubs, 'user':user, 'owners':owner_dict})
+    return render(request, 'my_clubs.html', {'clubs':clubs, 'user':user})
 
 """View for the member's profile"""
 @login_required
@@ -185,40 +215,142 @@ def member_profile(request, user_id):
         except ObjectDoesNotExist:
             return redirect('access_denied')
         else:
-            joined_clubs = Membership.objects.all().filter(user = request.user, is_member = True)
-            clubIDs = joined_clubs.values_list('club')
-            clubs = Club.objects.filter(id__in = clubIDs)
-            return render(request, 'member_profile.html', {'user': user, 'clubs': clubs})
+            load_joined_clubs(request)
+            return render(request, 'member_profile.html', {'user': user})
     else:
         return redirect('access_denied')
 
+MEMBER_SORT_KEYS = {
+    'name': ('user__first_name', 'user__last_name', 'id'),
+    'chess_xp': ('-user__chess_xp', 'id'),
+}
+
+MEMBER_ROSTER_FIELDS = (
+    'id', 'club', 'role', 'user',
+    'user__username', 'user__email_hash', 'user__first_name', 'user__last_name', 'user__bio', 'user__statement', 'user__chess_xp',
+)
+
+def view_members_sources(request, club_name):
+    return [latest_update(Club.objects.filter(name = club_name))]
+
+"""View for the paginated member roster of a club"""
 @login_required
 @member_required
+@conditional_page(view_members_sources)
 def view_members(request,club_name):
+    current_user = request.membership
+    selected_club = current_user.club
+    sort = request.GET.get('sort')
+    if sort not in MEMBER_SORT_KEYS:
+        sort = 'name'
+    page_size = clamp_page_size(request.GET.get('page_size'), settings.MEMBER_LIST_PAGE_SIZE, settings.MEMBER_LIST_MAX_PAGE_SIZE)
+    roster = (Membership.objects.members().filter(club = selected_club)
+        .exclude(user = request.user)
+        .select_related('user')
+        .only(*MEMBER_ROSTER_FIELDS))
+    paginator = KeysetPaginator(roster, MEMBER_SORT_KEYS[sort], page_size)
+    try:
+        members = paginator.page(request.GET.get('after'))
+    except InvalidCursor:
+        return redirect('view_members', club_name = club_name)
+    return (render(request, 'view_members.html',{'members':members, 'selected_club': selected_club, 'current_user': current_user, 'sort': sort, 'page_size': page_size} ))
+
+def club_profile_sources(request, club_name):
+    return [latest_update(Club.objects.filter(name = club_name)), latest_update(User.objects.filter(owned_clubs__name = club_name))]
+
+MEMBER_EXPORT_COLUMNS = (
+    ('First name', 'user__first_name'),
+    ('Last name', 'user__last_name'),
+    ('Email', 'user__username'),
+    ('Role', 'role'),
+    ('Chess XP', 'user__chess_xp'),
+    ('Bio', 'user__bio'),
+    ('Statement', 'user__statement'),
+)
+
+# Rows fetched from the database, and written to the response, at a time
+MEMBER_EXPORT_CHUNK_SIZE = 2000
+
+def spreadsheet_safe(value):
+    """Stop text a member wrote from being run as a formula when the CSV is opened in a spreadsheet."""
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + value
+    return value
+
+def csv_chunks(header, rows, chunk_size):
+    """Yield CSV text for a header and rows, chunk_size rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+"""View streaming the members of a club as a CSV file"""
+@login_required
+@officer_required
+def export_members(request, club_name):
+    role_labels = dict(Membership.Role.choices)
+    rows = (Membership.objects.members().filter(club = request.membership.club)
+        .order_by('id')
+        .values_list(*[lookup for heading, lookup in MEMBER_EXPORT_COLUMNS])
+        .iterator(chunk_size = MEMBER_EXPORT_CHUNK_SIZE))
+    role_column = [lookup for heading, lookup in MEMBER_EXPORT_COLUMNS].index('role')
+    rows = ([role_labels[value] if column == role_column else spreadsheet_safe(value) for column, value in enumerate(row)] for row in rows)
+    header = [heading for heading, lookup in MEMBER_EXPORT_COLUMNS]
+    response = StreamingHttpResponse(csv_chunks(header, rows, MEMBER_EXPORT_CHUNK_SIZE), content_type='text/csv')
+    filename = re.sub(r'[^\w.-]', '_', club_name)
+    response['Content-Disposition'] = f'attachment; filename="{filename}-members.csv"'
+    return response
 
-    selected_club = Club.objects.get(name = club_name)
-    members = Membership.objects.all().filter(club = selected_club).filter(is_member=True).exclude(user = request.user)
-    joined_clubs = Membership.objects.all().filter(user = request.user, is_member = True)
-    clubIDs = joined_clubs.values_list('club')
-    clubs = Club.objects.filter(id__in = clubIDs)
-    current_user = Membership.objects.all().get(user = request.user,club = selected_club)
-    return (render(request, 'view_members.html',{'members':members, 'selected_club': selected_club, 'clubs':clubs, 'current_user': current_user} ))
+# Rejected rows listed on the import page after an upload
+IMPORT_ERRORS_SHOWN = 100
+
+"""View to import members and applicants from a CSV file"""
+@login_required
+@owner_required
+def import_members(request, club_name):
+    errors, existing_accounts = [], []
+    if request.method == 'POST':
+        form = RosterUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                result = import_roster(request.membership.club, read_uploaded_roster(form.cleaned_data['roster']))
+            except (UnicodeDecodeError, csv.Error):
+                messages.add_message(request, messages.ERROR, "The file is not a readable UTF-8 CSV file.")
+            else:
+                messages.add_message(request, messages.SUCCESS,
+                    f"Created {result.users_created} users and {result.memberships_created} memberships.")
+                if result.errors:
+                    messages.add_message(request, messages.ERROR, f"Rejected {len(result.errors)} row(s).")
+                    errors = sorted(result.errors)[:IMPORT_ERRORS_SHOWN]
+                if result.existing_accounts:
+                    messages.add_message(request, messages.WARNING,
+                        f"{len(result.existing_accounts)} row(s) matched existing accounts, added as applicants only.")
+                    existing_accounts = sorted(result.existing_accounts)[:IMPORT_ERRORS_SHOWN]
+            form = RosterUploadForm()
+    else:
+        form = RosterUploadForm()
+    return render(request, 'import_members.html',
+        {'form': form, 'club_name': club_name, 'errors': errors, 'existing_accounts': existing_accounts})
 
 """View for the club profile page"""
 @login_required
+@conditional_page(club_profile_sources)
 def club_profile(request,club_name):
-    joined_clubs = Membership.objects.all().filter(user = request.user, is_member = True)
-    clubIDs = joined_clubs.values_list('club')
-    clubs = Club.objects.filter(id__in = clubIDs)
     try:
-        currentClub = Club.objects.get(name = club_name)
+        currentClub = Club.objects.with_owner().get(name = club_name)
     except ObjectDoesNotExist:
         return redirect('club_list')
     else:
-        memberSize = Membership.objects.all().filter(club = currentClub, is_member = True).count()
-        owner = Membership.objects.all().get(club = currentClub, is_owner = True)
+        memberSize = currentClub.member_count
+        owner = currentClub.owner
         have_applied = Membership.objects.all().filter(club = currentClub, user = request.user).exists()
-        return (render(request, 'club_profile.html', {'club':currentClub, 'memberSize': memberSize, 'owner': owner, 'have_applied': have_applied, 'clubs':clubs}))
+        return (render(request, 'club_profile.html', {'club':currentClub, 'memberSize': memberSize, 'owner': owner, 'have_applied': have_applied}))
 
 """View to apply for a club"""
 @login_required
@@ -237,25 +369,40 @@ def club_application(request, club_name):
 @login_required
 @officer_required
 def application_list(request, club_name):
-    try:
-        apply_club = Club.objects.get(name = club_name)
-        users = Membership.objects.filter(club = apply_club, is_member = False)
-        joined_clubs = Membership.objects.all().filter(user = request.user, is_member = True)
-        clubIDs = joined_clubs.values_list('club')
-        clubs = Club.objects.filter(id__in = clubIDs)
-        return render(request, 'application_list.html', {'users': users, 'club_name':club_name, 'clubs':clubs})
-    except ObjectDoesNotExist:
-        print("No applications")
+    apply_club = request.membership.club
+    users = Membership.objects.applications().filter(club = apply_club).select_related('user')
+    return render(request, 'application_list.html', {'users': users, 'club_name':club_name})
+
+"""View to approve or reject many applications at once"""
+@login_required
+@officer_required
+def bulk_application(request, club_name):
+    if request.method == 'POST':
+        form = BulkApplicationForm(request.POST)
+        if form.is_valid():
+            applications = Membership.objects.applications().filter(club = request.membership.club)
+            if not form.cleaned_data.get('select_all'):
+                applications = applications.filter(id__in = form.cleaned_data.get('applications'))
+            user_ids = list(applications.values_list('user_id', flat=True))
+            if form.cleaned_data.get('action') == 'approve':
+                count = applications.approve()
+                messages.add_message(request, messages.SUCCESS, f"Approved {count} application(s).")
+            else:
+                count = applications.reject()
+                messages.add_message(request, messages.SUCCESS, f"Rejected {count} application(s).")
+            invalidate_joined_clubs(*user_ids)
+        else:
+            messages.add_message(request, messages.ERROR, "Select at least one application.")
+    return redirect('application_list', club_name=club_name)
 
 
 """View to approve a application"""
 @login_required
 @officer_required
 def approve_application(request, club_name, user_id):
+    officer = request.membership
     try:
-        club = Club.objects.get(name = club_name)
-        officer = Membership.objects.get(user = request.user, club = club)
-        user = Membership.objects.get(id=user_id)
+        user = Membership.objects.get(id = user_id, club = officer.club)
     except ObjectDoesNotExist:
         return redirect('my_clubs')
     else:
@@ -266,10 +413,9 @@ def approve_application(request, club_name, user_id):
 @login_required
 @officer_required
 def reject_application(request, club_name, user_id):
+    officer = request.membership
     try:
-        club = Club.objects.get(name = club_name)
-        officer = Membership.objects.get(user = request.user, club = club)
-        user = Membership.objects.get(id=user_id)
+        user = Membership.objects.get(id = user_id, club = officer.club)
     except ObjectDoesNotExist:
         return redirect('my_clubs')
     else:
@@ -281,10 +427,9 @@ def reject_application(request, club_name, user_id):
 @login_required
 @owner_required
 def promote_member(request, club_name, user_id):
+    owner = request.membership
     try:
-        club = Club.objects.get(name = club_name)
-        owner = Membership.objects.get(user = request.user, club = club)
-        user = Membership.objects.get(id=user_id)
+        user = Membership.objects.get(id = user_id, club = owner.club)
     except ObjectDoesNotExist:
         return redirect('view_members', club_name = club_name)
     else:
@@ -295,10 +440,9 @@ def promote_member(request, club_name, user_id):
 @login_required
 @owner_required
 def demote_officer(request, club_name, user_id):
+    owner = request.membership
     try:
-        club = Club.objects.get(name = club_name)
-        owner = Membership.objects.get(user = request.user, club = club)
-        user = Membership.objects.get(id=user_id)
+        user = Membership.objects.get(id = user_id, club = owner.club)
     except ObjectDoesNotExist:
         return redirect('view_members', club_name = club_name)
     else:
@@ -309,18 +453,28 @@ def demote_officer(request, club_name, user_id):
 @login_required
 @owner_required
 def transfer_ownership(request, club_name, user_id):
+    owner = request.membership
     try:
-        club = Club.objects.get(name = club_name)
-        owner = Membership.objects.get(user=request.user, club = club)
-        user = Membership.objects.get(id=user_id)
-        if user.is_officer:
-            owner.transfer_ownership(user)
-            return redirect('club_home', club_name = club_name)
-        else:
-            return redirect('access_denied')
+        user = Membership.objects.get(id = user_id, club = owner.club)
+        owner.transfer_ownership(user)
+        return redirect('club_home', club_name = club_name)
+    except OwnershipTransferError:
+        return redirect('access_denied')
     except ObjectDoesNotExist:
         return redirect('club_home', club_name = club_name)
 
+"""View serving the avatar of a registered user from the local avatar cache"""
+@login_required
+def avatar(request, email_hash, size):
+    if not valid_avatar(email_hash, size) or not User.objects.filter(email_hash = email_hash).exists():
+        raise Http404
+    image = get_avatar(email_hash, size)
+    response = HttpResponse(image.content, content_type=image.content_type)
+    response['ETag'] = image.etag
+    patch_cache_control(response, private=True,
+        max_age=settings.AVATAR_PLACEHOLDER_MAX_AGE if image.placeholder else settings.AVATAR_MAX_AGE)
+    return get_conditional_response(request, etag=image.etag, response=response)
+
 """View to log out"""
 def log_out(request):
     logout(request)
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'clubs.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,13 +52,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'clubs.profiling.ProfilingMiddleware',
+    'clubs.timing.ViewTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'clubs.timing.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -66,6 +69,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'clubs.context_processors.joined_clubs',
             ],
         },
     },
@@ -140,6 +144,41 @@ AUTH_USERCLUBS_MODEL = 'clubs.UserClubs'
 # Login URL for redirecting users from login protected views
 LOGIN_URL = 'log_in'
 
+# Seconds to cache each user's "My Clubs" navbar list, 0 disables the cache
+JOINED_CLUBS_CACHE_TIMEOUT = 0
+
+# Number of clubs shown per page of the club list, and the most a client may request
+CLUB_LIST_PAGE_SIZE = 20
+CLUB_LIST_MAX_PAGE_SIZE = 100
+
+# Number of members shown per page of a club roster, and the most a client may request
+MEMBER_LIST_PAGE_SIZE = 50
+MEMBER_LIST_MAX_PAGE_SIZE = 200
+
+# Rows per page of the JSON API lists, and the most a client may request
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# Avatar proxy: on-disk image cache, upstream fetcher and freshness in seconds
+AVATAR_CACHE_DIR = BASE_DIR / 'avatar_cache'
+AVATAR_FETCHER = 'clubs.avatars.fetch_gravatar'
+AVATAR_UPSTREAM_URL = 'https://www.gravatar.com/avatar/{hash}?size={size}&default=mp'
+AVATAR_FETCH_TIMEOUT = 3
+# The sizes User.avatar and User.mini_avatar link to; no other size is served
+AVATAR_SIZES = (60, 120)
+AVATAR_MAX_AGE = 60 * 60 * 24 * 7
+AVATAR_REVALIDATE_AFTER = 60 * 60 * 24
+AVATAR_PLACEHOLDER_MAX_AGE = 60 * 5
+
+# Fraction of requests timed by RequestTimingMiddleware, 0 turns timing off
+REQUEST_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.1
+
+# Staff requests with ?profile=1 are profiled: where profiles are saved, how
+# many are kept and how many entries the inline report shows
+PROFILE_DIR = BASE_DIR / 'profiles'
+PROFILE_RETENTION = 50
+PROFILE_TOP_ENTRIES = 30
+
 #Activate django_heroku
 if '/app' in os.environ['HOME']:
     import django_heroku
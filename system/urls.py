@@ -15,7 +15,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from clubs import views
+from clubs import api, views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -28,16 +28,25 @@ urlpatterns = [
     path('application_list/<club_name>/', views.application_list, name='application_list'),
     path('approve_application/<club_name>/<int:user_id>', views.approve_application, name='approve_application'),
     path('reject_application/<club_name>/<int:user_id>', views.reject_application, name='reject_application'),
+    path('bulk_application/<club_name>/', views.bulk_application, name='bulk_application'),
     path('create_club/', views.create_club, name = 'create_club'),
     path('club_list/', views.club_list, name='club_list'),
+    path('club_search/', views.club_search, name='club_search'),
     path('my_clubs/', views.my_clubs, name='my_clubs'),
     path('club_profile/<club_name>/', views.club_profile, name ='club_profile'),
     path('club_application/<club_name>/', views.club_application, name ='club_application'),
     path('member_profile/<int:user_id>/', views.member_profile, name ='member_profile'),
     path('view_members/<club_name>/', views.view_members, name ='view_members'),
+    path('import_members/<club_name>/', views.import_members, name ='import_members'),
+    path('export_members/<club_name>/', views.export_members, name ='export_members'),
     path('promote_member/<club_name>/<int:user_id>', views.promote_member, name='promote_member'),
     path('demote_officer/<club_name>/<int:user_id>', views.demote_officer, name='demote_officer'),
     path('transfer_ownership/<club_name>/<int:user_id>', views.transfer_ownership, name='transfer_ownership'),
+    path('avatar/<email_hash>/<int:size>/', views.avatar, name='avatar'),
+    path('api/v1/clubs/', api.clubs, name='api_clubs'),
+    path('api/v1/clubs/<club_name>/', api.club_detail, name='api_club_detail'),
+    path('api/v1/clubs/<club_name>/members/', api.club_members, name='api_club_members'),
+    path('api/v1/me/memberships/', api.my_memberships, name='api_my_memberships'),
     path('log_out/', views.log_out, name='log_out'),
     path('access_denied/',views.access_denied,name='access_denied'),
 ]